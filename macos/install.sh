@@ -72,9 +72,26 @@ mkdir -p "$LAUNCH_AGENT_DIR"
 
 echo "Copying shared source files..."
 cp "$REPO_ROOT/src/__init__.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/activity_history.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/cache.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/client.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/collector.py" "$INSTALL_DIR/src/"
 cp "$REPO_ROOT/src/config.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/ctl.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/daemon.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/diagnostics.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/history.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/metrics.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/opencode_cli.py" "$INSTALL_DIR/src/"
 cp "$REPO_ROOT/src/opencode_data.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/path_trie.py" "$INSTALL_DIR/src/"
 cp "$REPO_ROOT/src/platform.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/protocol.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/scheduler.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/session_store.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/statusbar.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/timing.py" "$INSTALL_DIR/src/"
+cp "$REPO_ROOT/src/tracing.py" "$INSTALL_DIR/src/"
 
 echo "Copying macOS application files..."
 cp "$REPO_ROOT/macos/__init__.py" "$INSTALL_DIR/macos/"
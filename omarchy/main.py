@@ -4,18 +4,16 @@ OpenCode Session Activity Monitor - Transparent overlay for Hyprland/Wayland
 
 Config: ~/.config/opencode-activity-monitor/config.toml
 Toggle click-through: kill -USR1 $(pgrep -f opencode-activity-monitor)
+Memory diagnostics: kill -s RTMIN+1 $(pgrep -f opencode-activity-monitor)
+  (first signal starts allocation tracing, the next dumps and stops it)
 """
 
 import gi
 gi.require_version('Gtk', '4.0')
 
 from gi.repository import Gtk, GLib
-import os
 import signal
 
-from omarchy.overlay import SessionOverlay
-from omarchy.tray_manager import start_tray_process
-
 
 _window = None
 
@@ -32,6 +30,12 @@ def visibility_handler(signum, frame):
         GLib.idle_add(_window.toggle_visibility)
 
 
+def diagnostics_handler(signum, frame):
+    global _window
+    if _window:
+        GLib.idle_add(_window.dump_diagnostics)
+
+
 def quit_handler(signum, frame):
     GLib.idle_add(Gtk.Application.get_default().quit)
 
@@ -42,9 +46,26 @@ class App(Gtk.Application):
 
     def do_activate(self):
         global _window
+        # Imported here so layer-shell and the data pipeline load after the
+        # application is up rather than before anything runs
+        from omarchy.overlay import SessionOverlay
+
         _window = SessionOverlay(self)
         _window.present()
-        start_tray_process(os.getpid())
+        GLib.idle_add(self._start_tray)
+
+    def _start_tray(self) -> bool:
+        from omarchy.tray import StatusNotifierItem
+
+        tray = StatusNotifierItem(
+            on_toggle_visibility=_window.toggle_visibility,
+            on_toggle_input=_window.toggle_input,
+            on_quit=self.quit,
+            on_registration_changed=_window.on_tray_registration_changed,
+        )
+        tray.start()
+        _window.set_tray(tray)
+        return False
 
 
 def main():
@@ -52,6 +73,7 @@ def main():
     signal.signal(signal.SIGTERM, quit_handler)
     signal.signal(signal.SIGUSR1, toggle_handler)
     signal.signal(signal.SIGUSR2, visibility_handler)
+    signal.signal(signal.SIGRTMIN + 1, diagnostics_handler)
 
     app = App()
     app.run(None)
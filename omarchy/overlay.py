@@ -2,28 +2,57 @@
 
 from __future__ import annotations
 
-import time
-import threading
-from typing import Optional
+import dataclasses
+import os
+from typing import TYPE_CHECKING, Optional
 
-import cairo
 import gi
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Gtk4LayerShell', '1.0')
 from gi.repository import Gtk, GLib, Gtk4LayerShell as LayerShell
 
-from src.config import CONFIG
-from src import opencode_data
+from src.config import CONFIG, ConfigWatcher
+from src.scheduler import AdaptiveInterval
+from src import timing
+from src.timing import TIMINGS
 from omarchy import ui
+from omarchy.pidwatch import PidWatcher
+
+if TYPE_CHECKING:
+    from src import opencode_data
+
+# How often config.toml is checked for edits
+CONFIG_POLL_SECONDS = 2
+# Phases shown in the debug footer, in refresh order (p50/p95 ms)
+DEBUG_PHASES = ["scan", "parse", "titles", "tree", "cpu", "rows", "sort", "ui", "fetch"]
 
 
 class SessionOverlay(Gtk.Window):
     def __init__(self, app):
         super().__init__(application=app)
+        timing.configure()
 
         self.click_through = CONFIG["behavior"]["click_through"]
         self.interactive_widgets = []
+        self._last_data: list[opencode_data.Session] = []
+        self._exited_pids: set[int] = set()
+        self.pid_watcher = PidWatcher(self._on_process_exit)
+        self._applied_seq = 0
+        self._rows: dict[str, ui.SessionRow] = {}
+        self._group_headers: dict[str, ui.GroupHeader] = {}
+        self._collapsed: set[str] = set()
+        self._header: Optional[Gtk.Label] = None
+        self._empty_label: Optional[Gtk.Label] = None
+        # ((session id, group) per row, collapsed groups) as last laid out;
+        # None forces the first layout pass
+        self._layout: Optional[tuple] = None
+        self._snapshot_pending = False
+        self._widget_counts: dict[str, int] = {}
+
+        self.collector = None
+        self.snapshot_server = None
+        self.tray = None
 
         LayerShell.init_for_window(self)
         LayerShell.set_layer(self, LayerShell.Layer.OVERLAY)
@@ -45,10 +74,68 @@ class SessionOverlay(Gtk.Window):
         self.content_box.add_css_class("overlay-content")
         self.main_box.append(self.content_box)
 
+        # Shown until the first snapshot arrives; update_ui replaces it
+        placeholder = Gtk.Label(label="Loading sessions…")
+        placeholder.add_css_class("status-idle")
+        placeholder.set_halign(Gtk.Align.CENTER)
+        self.content_box.append(placeholder)
+
+        self._debug_label: Optional[Gtk.Label] = None
+        if TIMINGS.enabled:
+            self._debug_label = Gtk.Label(label="")
+            self._debug_label.add_css_class("debug-footer")
+            self._debug_label.set_halign(Gtk.Align.START)
+            self._debug_label.set_wrap(True)
+            self.main_box.append(self._debug_label)
+
         self.connect("realize", self.on_realize)
 
-        self.refresh_data()
-        GLib.timeout_add(CONFIG["monitor"]["refresh_interval_ms"], self.refresh_data)
+        self.interval = self._make_interval()
+        self._refresh_source: Optional[int] = None
+
+        self._config_watcher = ConfigWatcher()
+        GLib.timeout_add_seconds(CONFIG_POLL_SECONDS, self._check_config)
+
+        # Paint the window first; collection (and its imports) come after
+        GLib.idle_add(self._start_collection)
+
+    @staticmethod
+    def _make_interval() -> AdaptiveInterval:
+        monitor = CONFIG["monitor"]
+        return AdaptiveInterval(
+            monitor["refresh_interval_ms"],
+            monitor["min_refresh_interval_ms"],
+            monitor["max_refresh_interval_ms"],
+        )
+
+    def _check_config(self) -> bool:
+        changed = self._config_watcher.check()
+        if changed:
+            self._apply_config(changed)
+        return True
+
+    def _apply_config(self, changed: set[str]):
+        """Apply an edited config.toml live, keeping rows and activity state."""
+        if changed & {"appearance", "colors"}:
+            ui.load_css()
+            width = CONFIG["appearance"]["width"]
+            self.set_default_size(width, 1)
+            self.set_size_request(width, -1)
+            # Rebuild rows so per-row options such as the sparkline apply
+            self._rows.clear()
+            self._layout = None
+            self.update_ui(self._last_data)
+        if "position" in changed:
+            self._setup_position()
+        if "behavior" in changed:
+            self.set_input_passthrough(CONFIG["behavior"]["click_through"])
+        if "monitor" in changed:
+            self.interval = self._make_interval()
+            if self.get_visible():
+                self.refresh_data()
+        restart_only = changed & {"history", "metrics", "debug"}
+        if restart_only:
+            print(f"Config [{'], ['.join(sorted(restart_only))}] takes effect after a restart")
 
     def _setup_position(self):
         pos = CONFIG["position"]
@@ -91,6 +178,8 @@ class SessionOverlay(Gtk.Window):
             surface.set_input_region(None)
             return
 
+        import cairo
+
         region = cairo.Region()
 
         for widget in self.interactive_widgets:
@@ -111,9 +200,18 @@ class SessionOverlay(Gtk.Window):
     def toggle_visibility(self):
         if self.get_visible():
             self.hide()
+            if self._collects_while_hidden():
+                self._schedule_refresh(self._refresh_delay_ms())
+            else:
+                # Nobody to show it to, so stop collecting until visible again
+                self._cancel_refresh()
         else:
             self.show()
             self.present()
+            # Rows were left alone while hidden
+            self.update_ui(self._last_data)
+            self.interval.reset()
+            self.refresh_data()
         width = CONFIG["appearance"]["width"]
         self.set_default_size(width, 1)
         self.set_size_request(width, -1)
@@ -122,13 +220,145 @@ class SessionOverlay(Gtk.Window):
         GLib.idle_add(self.update_input_region)
 
 
+    def _start_collection(self) -> bool:
+        from src.client import RemoteCollector
+        from src.daemon import start_shared_collector
+
+        # Either a client of a running collector daemon, or a local collector
+        # that also serves the socket for other consumers
+        collector, self.snapshot_server = start_shared_collector()
+        self.collector = collector
+        collector.add_listener(self._on_snapshot)
+        if isinstance(collector, RemoteCollector):
+            collector.add_disconnect_listener(
+                lambda: GLib.idle_add(self._on_collector_lost, collector))
+        collector.start()
+        self.refresh_data()
+
+        from src import diagnostics
+        diagnostics.register_provider("gtk", lambda: dict(self._widget_counts))
+        return False
+
+    def _on_collector_lost(self, collector) -> bool:
+        """Take over collecting, or attach to whoever serves the socket now."""
+        if collector is not self.collector or collector.connected.is_set():
+            return False
+        collector.remove_listener(self._on_snapshot)
+        collector.stop()
+        # The next collector numbers its snapshots from scratch
+        self._applied_seq = 0
+        self._start_collection()
+        return False
+
+    def dump_diagnostics(self) -> bool:
+        """Toggle allocation tracing (see main.py signals).
+
+        The first signal starts tracemalloc; the next writes a report with
+        the allocators seen since and stops it again.
+        """
+        from src import diagnostics
+        path = diagnostics.toggle()
+        if path is None:
+            print("Tracing allocations; signal again to write diagnostics")
+        else:
+            print(f"Diagnostics written to {path}")
+        return False
+
+    def _count_widgets(self) -> int:
+        count = 0
+        stack = [self.main_box]
+        while stack:
+            widget = stack.pop()
+            count += 1
+            child = widget.get_first_child()
+            while child is not None:
+                stack.append(child)
+                child = child.get_next_sibling()
+        return count
+
     def refresh_data(self) -> bool:
-        def fetch():
-            data_response = opencode_data.fetch_data()
-            self._last_data = data_response
-            GLib.idle_add(self.update_ui, data_response)
-        threading.Thread(target=fetch, daemon=True).start()
-        return True
+        """Collect now, and keep a fallback timer in case no snapshot arrives."""
+        if self.collector is None:
+            return False
+        self.collector.request_refresh()
+        self._schedule_refresh(self._refresh_delay_ms())
+        return False
+
+    def _collects_while_hidden(self) -> bool:
+        """Whether a shown tray icon or socket clients still need snapshots."""
+        if self.tray is not None and self.tray.registered:
+            return True
+        return self.snapshot_server is not None and self.snapshot_server.client_count > 0
+
+    def _refresh_delay_ms(self, sessions=None) -> int:
+        if not self.get_visible():
+            return CONFIG["monitor"]["max_refresh_interval_ms"]
+        if sessions is None:
+            return self.interval.current_ms
+        return self.interval.next_interval(sessions)
+
+    def _schedule_refresh(self, delay_ms: int):
+        self._cancel_refresh()
+        self._refresh_source = GLib.timeout_add(delay_ms, self._on_refresh_timer)
+
+    def _cancel_refresh(self):
+        if self._refresh_source is not None:
+            GLib.source_remove(self._refresh_source)
+            self._refresh_source = None
+
+    def _on_refresh_timer(self) -> bool:
+        self._refresh_source = None
+        self.refresh_data()
+        return False
+
+    def _on_snapshot(self, snapshot):
+        # Runs on the collector thread; bursts of snapshots collapse into a
+        # single idle callback that applies whichever one is newest.
+        if not self._snapshot_pending:
+            self._snapshot_pending = True
+            GLib.idle_add(self._apply_latest_snapshot)
+
+    def _apply_latest_snapshot(self) -> bool:
+        self._snapshot_pending = False
+        snapshot = self.collector.snapshot
+        if snapshot.seq > self._applied_seq:
+            self._applied_seq = snapshot.seq
+            self._on_data(list(snapshot.sessions))
+            if self.get_visible() or self._collects_while_hidden():
+                self._schedule_refresh(self._refresh_delay_ms(snapshot.sessions))
+        return False
+
+    def _on_data(self, sessions: list[opencode_data.Session]) -> bool:
+        # A fetch that started before a pidfd fired may still report the
+        # exited process; keep it hidden until a scan no longer sees it.
+        fetched_pids = {s.pid for s in sessions}
+        self._exited_pids &= fetched_pids
+        if self._exited_pids:
+            sessions = self._without_pids(sessions, self._exited_pids)
+
+        self._last_data = sessions
+        self.pid_watcher.sync(s.pid for s in sessions)
+        self.update_ui(sessions)
+        return False
+
+    def _on_process_exit(self, pid: int):
+        self._exited_pids.add(pid)
+        sessions = self._without_pids(self._last_data, {pid})
+        if len(sessions) != len(self._last_data):
+            self._last_data = sessions
+            self.update_ui(sessions)
+
+    @staticmethod
+    def _without_pids(sessions: list[opencode_data.Session],
+                      pids: set[int]) -> list[opencode_data.Session]:
+        remaining = [s for s in sessions if s.pid not in pids]
+        if remaining and remaining[0].is_group_start:
+            remaining[0] = dataclasses.replace(remaining[0], is_group_start=False)
+        return remaining
+
+    def _toggle_group(self, group: str):
+        self._collapsed ^= {group}
+        self.update_ui(self._last_data)
 
     def _request_compact_height(self):
         width = CONFIG["appearance"]["width"]
@@ -145,37 +375,129 @@ class SessionOverlay(Gtk.Window):
         self.queue_resize()
         return False
 
-    def update_ui(self, sessions: list[opencode_data.Session]):
-        while child := self.content_box.get_first_child():
-            self.content_box.remove(child)
-
-        self.interactive_widgets = []
+    def _get_header(self) -> Gtk.Label:
+        if self._header is None:
+            self._header = Gtk.Label()
+            self._header.set_markup("<b>OPENCODE</b>")
+            self._header.set_halign(Gtk.Align.START)
+            self._header.set_margin_bottom(2)
+            self._header.add_css_class("provider-name")
+        return self._header
+
+    def _get_empty_label(self) -> Gtk.Label:
+        if self._empty_label is None:
+            self._empty_label = Gtk.Label(label="No active sessions")
+            self._empty_label.add_css_class("status-idle")
+            self._empty_label.set_halign(Gtk.Align.CENTER)
+        return self._empty_label
+
+    def _place_children(self, widgets: list[Gtk.Widget]):
+        """Make content_box contain exactly widgets, in order, reusing them."""
+        wanted = set(widgets)
+        child = self.content_box.get_first_child()
+        while child is not None:
+            next_child = child.get_next_sibling()
+            if child not in wanted:
+                self.content_box.remove(child)
+            child = next_child
+
+        prev = None
+        for widget in widgets:
+            if widget.get_parent() is None:
+                self.content_box.insert_child_after(widget, prev)
+            elif widget.get_prev_sibling() is not prev:
+                self.content_box.reorder_child_after(widget, prev)
+            prev = widget
+
+    def set_tray(self, tray):
+        """Mirror the session counts in a tray icon from now on."""
+        self.tray = tray
+        tray.update(self._last_data)
+
+    def on_tray_registration_changed(self):
+        """A tray host appeared or went away; only matters while hidden."""
+        if self.get_visible() or self.collector is None:
+            return
+        if self._collects_while_hidden():
+            self.refresh_data()
+        else:
+            self._cancel_refresh()
 
-        if not sessions:
-            lbl = Gtk.Label(label="No active sessions")
-            lbl.add_css_class("status-idle")
-            lbl.set_halign(Gtk.Align.CENTER)
-            self.content_box.append(lbl)
-            self._request_compact_height()
+    def update_ui(self, sessions: list[opencode_data.Session]):
+        with TIMINGS.phase("ui"):
+            # A hidden window is brought up to date when shown again
+            if self.get_visible():
+                self._update_ui(sessions)
+            if self.tray is not None:
+                self.tray.update(sessions)
+        if self._debug_label is not None:
+            self._debug_label.set_label(TIMINGS.format_line(DEBUG_PHASES))
+
+    def _update_ui(self, sessions: list[opencode_data.Session]):
+        groups: dict[str, list[opencode_data.Session]] = {}
+        for session in sessions:
+            groups.setdefault(session.group, []).append(session)
+        # A single group needs no header
+        show_headers = len(groups) > 1
+        self._collapsed &= groups.keys()
+        layout = (
+            tuple((s.id, s.group) for s in sessions),
+            frozenset(self._collapsed) if show_headers else frozenset(),
+        )
+
+        # Update rows in place; only create widgets for new sessions
+        for session in sessions:
+            row = self._rows.get(session.id)
+            if row is None:
+                self._rows[session.id] = ui.SessionRow(
+                    session.project,
+                    session.status,
+                    session.last_active_fmt,
+                    session.activity,
+                    session.busy_child,
+                )
+            else:
+                row.update(session.project, session.status, session.last_active_fmt,
+                           session.activity, session.busy_child)
+
+        if show_headers:
+            for group, members in groups.items():
+                header = self._group_headers.get(group)
+                if header is None:
+                    header = self._group_headers[group] = ui.GroupHeader(
+                        lambda group=group: self._toggle_group(group))
+                    self.interactive_widgets.append(header.widget)
+                header.update(os.path.basename(group) or group, len(members),
+                              group in self._collapsed)
+
+        if layout == self._layout:
             return
+        self._layout = layout
 
-        header = Gtk.Label()
-        header.set_markup("<b>OPENCODE</b>")
-        header.set_halign(Gtk.Align.START)
-        header.set_margin_bottom(2)
-        header.add_css_class("provider-name")
-        self.content_box.append(header)
+        current_ids = {s.id for s in sessions}
+        for session_id in [sid for sid in self._rows if sid not in current_ids]:
+            del self._rows[session_id]
+        for group in [g for g in self._group_headers if not show_headers or g not in groups]:
+            self.interactive_widgets.remove(self._group_headers.pop(group).widget)
 
-        for session in sessions:
-            if session.is_group_start:
-                self.content_box.append(ui.make_separator())
-            
-            row = ui.make_session_row(
-                session.project,
-                session.status,
-                session.last_active_fmt,
-            )
-            self.content_box.append(row)
+        if not sessions:
+            widgets = [self._get_empty_label()]
+        else:
+            widgets = [self._get_header()]
+            for group, members in groups.items():
+                if show_headers:
+                    widgets.append(self._group_headers[group].widget)
+                    if group in self._collapsed:
+                        continue
+                widgets.extend(self._rows[s.id].widget for s in members)
+
+        self._place_children(widgets)
+        # Cached here because diagnostics read it off the GTK thread
+        self._widget_counts = {
+            'rows': len(self._rows),
+            'group_headers': len(self._group_headers),
+            'widgets': self._count_widgets(),
+        }
 
         self._request_compact_height()
         GLib.idle_add(self.update_input_region)
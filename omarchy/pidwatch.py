@@ -0,0 +1,59 @@
+"""Process exit notification via pidfds registered in the GLib main loop."""
+
+from __future__ import annotations
+
+import os
+from typing import Callable, Dict, Iterable
+
+from gi.repository import GLib
+
+from src.platform import open_pidfd
+
+
+class PidWatcher:
+    """Watch a set of PIDs and call back on the main loop when one exits.
+
+    PIDs whose pidfd cannot be opened are simply not watched; their exit is
+    picked up by the regular refresh poll instead.
+    """
+
+    def __init__(self, on_exit: Callable[[int], None]):
+        self._on_exit = on_exit
+        self._watches: Dict[int, tuple[int, int]] = {}
+
+    def sync(self, pids: Iterable[int]) -> None:
+        """Watch exactly the given PIDs."""
+        wanted = set(pids)
+
+        for pid in [pid for pid in self._watches if pid not in wanted]:
+            self._unwatch(pid)
+
+        for pid in wanted:
+            if pid in self._watches:
+                continue
+            fd = open_pidfd(pid)
+            if fd is None:
+                continue
+            source_id = GLib.unix_fd_add_full(
+                GLib.PRIORITY_DEFAULT,
+                fd,
+                GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+                self._on_ready,
+                pid,
+            )
+            self._watches[pid] = (fd, source_id)
+
+    def _on_ready(self, fd: int, condition, pid: int) -> bool:
+        self._watches.pop(pid, None)
+        os.close(fd)
+        self._on_exit(pid)
+        return False
+
+    def _unwatch(self, pid: int) -> None:
+        fd, source_id = self._watches.pop(pid)
+        GLib.source_remove(source_id)
+        os.close(fd)
+
+    def clear(self) -> None:
+        for pid in list(self._watches):
+            self._unwatch(pid)
@@ -1,77 +1,371 @@
-#!/usr/bin/env python3
+"""In-process StatusNotifierItem tray icon over D-Bus.
+
+Publishes org.kde.StatusNotifierItem (with a com.canonical.dbusmenu menu)
+from the overlay's own GLib main loop. The icon and tooltip show the
+active/idle/stale counts of the sessions the overlay already has, so the
+tray never scans anything itself.
+"""
+
+from __future__ import annotations
+
 import os
 import sys
-import signal
-
-# Use Wayland for GTK3 to avoid initialization issues in some environments
-os.environ["GDK_BACKEND"] = "wayland"
-
-import gi
-try:
-    gi.require_version('Gtk', '3.0')
-    gi.require_version('AyatanaAppIndicator3', '0.1')
-    from gi.repository import Gtk, AyatanaAppIndicator3 as AppIndicator, GLib
-except Exception as e:
-    print(f"Tray import error: {e}")
-    sys.exit(1)
-
-def run_tray(parent_pid):
-    Gtk.init(None)
-    
-    # Check if parent exists
+from typing import Callable, Optional
+
+from gi.repository import Gio, GLib
+
+from src.config import CONFIG
+from src.statusbar import format_status
+
+SNI_INTERFACE = "org.kde.StatusNotifierItem"
+SNI_PATH = "/StatusNotifierItem"
+MENU_INTERFACE = "com.canonical.dbusmenu"
+MENU_PATH = "/MenuBar"
+WATCHER_NAME = "org.kde.StatusNotifierWatcher"
+WATCHER_PATH = "/StatusNotifierWatcher"
+
+FALLBACK_ICON = "utilities-system-monitor"
+ICON_SIZE = 22
+
+INTROSPECTION_XML = f"""
+<node>
+  <interface name="{SNI_INTERFACE}">
+    <property name="Category" type="s" access="read"/>
+    <property name="Id" type="s" access="read"/>
+    <property name="Title" type="s" access="read"/>
+    <property name="Status" type="s" access="read"/>
+    <property name="IconName" type="s" access="read"/>
+    <property name="IconPixmap" type="a(iiay)" access="read"/>
+    <property name="ToolTip" type="(sa(iiay)ss)" access="read"/>
+    <property name="ItemIsMenu" type="b" access="read"/>
+    <property name="Menu" type="o" access="read"/>
+    <method name="Activate"><arg name="x" type="i" direction="in"/><arg name="y" type="i" direction="in"/></method>
+    <method name="SecondaryActivate"><arg name="x" type="i" direction="in"/><arg name="y" type="i" direction="in"/></method>
+    <method name="ContextMenu"><arg name="x" type="i" direction="in"/><arg name="y" type="i" direction="in"/></method>
+    <method name="Scroll"><arg name="delta" type="i" direction="in"/><arg name="orientation" type="s" direction="in"/></method>
+    <signal name="NewTitle"/>
+    <signal name="NewIcon"/>
+    <signal name="NewToolTip"/>
+    <signal name="NewStatus"><arg name="status" type="s"/></signal>
+  </interface>
+  <interface name="{MENU_INTERFACE}">
+    <property name="Version" type="u" access="read"/>
+    <property name="TextDirection" type="s" access="read"/>
+    <property name="Status" type="s" access="read"/>
+    <property name="IconThemePath" type="as" access="read"/>
+    <method name="GetLayout">
+      <arg name="parentId" type="i" direction="in"/>
+      <arg name="recursionDepth" type="i" direction="in"/>
+      <arg name="propertyNames" type="as" direction="in"/>
+      <arg name="revision" type="u" direction="out"/>
+      <arg name="layout" type="(ia{{sv}}av)" direction="out"/>
+    </method>
+    <method name="GetGroupProperties">
+      <arg name="ids" type="ai" direction="in"/>
+      <arg name="propertyNames" type="as" direction="in"/>
+      <arg name="properties" type="a(ia{{sv}})" direction="out"/>
+    </method>
+    <method name="GetProperty">
+      <arg name="id" type="i" direction="in"/>
+      <arg name="name" type="s" direction="in"/>
+      <arg name="value" type="v" direction="out"/>
+    </method>
+    <method name="Event">
+      <arg name="id" type="i" direction="in"/>
+      <arg name="eventId" type="s" direction="in"/>
+      <arg name="data" type="v" direction="in"/>
+      <arg name="timestamp" type="u" direction="in"/>
+    </method>
+    <method name="EventGroup">
+      <arg name="events" type="a(isvu)" direction="in"/>
+      <arg name="idErrors" type="ai" direction="out"/>
+    </method>
+    <method name="AboutToShow">
+      <arg name="id" type="i" direction="in"/>
+      <arg name="needUpdate" type="b" direction="out"/>
+    </method>
+    <method name="AboutToShowGroup">
+      <arg name="ids" type="ai" direction="in"/>
+      <arg name="updatesNeeded" type="ai" direction="out"/>
+      <arg name="idErrors" type="ai" direction="out"/>
+    </method>
+    <signal name="ItemsPropertiesUpdated">
+      <arg name="updatedProps" type="a(ia{{sv}})"/>
+      <arg name="removedProps" type="a(ias)"/>
+    </signal>
+    <signal name="LayoutUpdated">
+      <arg name="revision" type="u"/>
+      <arg name="parent" type="i"/>
+    </signal>
+  </interface>
+</node>
+"""
+
+# Menu item ids
+_ITEM_SUMMARY = 1
+_ITEM_TOGGLE = 2
+_ITEM_CLICK_THROUGH = 3
+_ITEM_SEPARATOR = 4
+_ITEM_QUIT = 5
+
+
+def _rgb(color: str) -> tuple:
+    color = color.lstrip("#")
+    return tuple(int(color[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+def render_icon(counts: dict, css_class: str) -> Optional[tuple]:
+    """Draw a status dot with the active count as an SNI pixmap.
+
+    Returns (width, height, ARGB32 bytes in network order), or None when
+    cairo is unavailable and the themed fallback icon should be used.
+    """
     try:
-        if parent_pid != 0:
-            os.kill(parent_pid, 0)
-    except ProcessLookupError:
-        print("Tray: Parent process not found, exiting.")
-        sys.exit(0)
-
-    indicator = AppIndicator.Indicator.new(
-        "opencode-activity-monitor-tray",
-        "utilities-system-monitor",
-        AppIndicator.IndicatorCategory.APPLICATION_STATUS
-    )
-    indicator.set_status(AppIndicator.IndicatorStatus.ACTIVE)
-    
-    menu = Gtk.Menu()
-    
-    item_toggle = Gtk.MenuItem(label="Show/Hide Overlay")
-    item_toggle.connect("activate", lambda _: os.kill(parent_pid, signal.SIGUSR2))
-    menu.append(item_toggle)
-    
-    item_click = Gtk.MenuItem(label="Toggle Click-through")
-    item_click.connect("activate", lambda _: os.kill(parent_pid, signal.SIGUSR1))
-    menu.append(item_click)
-    
-    menu.append(Gtk.SeparatorMenuItem())
-    
-    item_quit = Gtk.MenuItem(label="Exit")
-    item_quit.connect("activate", lambda _: (os.kill(parent_pid, signal.SIGTERM), Gtk.main_quit()))
-    menu.append(item_quit)
-    
-    menu.show_all()
-    indicator.set_menu(menu)
-    
-    # Exit if parent dies
-    def check_parent():
+        import cairo
+    except ImportError:
+        return None
+
+    colors = CONFIG["colors"]
+    fill = {
+        'active': colors["ok"],
+        'idle': colors["warning"],
+        'stale': colors["critical"],
+    }.get(css_class, "#808080")
+
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, ICON_SIZE, ICON_SIZE)
+    ctx = cairo.Context(surface)
+    ctx.set_source_rgb(*_rgb(fill))
+    ctx.arc(ICON_SIZE / 2, ICON_SIZE / 2, ICON_SIZE / 2 - 1, 0, 6.2832)
+    ctx.fill()
+
+    label = str(counts['active']) if counts['active'] else ""
+    if label:
+        ctx.set_source_rgb(1, 1, 1)
+        ctx.select_font_face("sans-serif", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD)
+        ctx.set_font_size(13 if len(label) == 1 else 10)
+        extents = ctx.text_extents(label)
+        ctx.move_to(ICON_SIZE / 2 - extents.width / 2 - extents.x_bearing,
+                    ICON_SIZE / 2 - extents.height / 2 - extents.y_bearing)
+        ctx.show_text(label)
+    surface.flush()
+
+    # cairo stores native-endian 32-bit pixels; SNI wants big-endian ARGB
+    native = bytes(surface.get_data())
+    if sys.byteorder == "big":
+        return ICON_SIZE, ICON_SIZE, native
+    argb = bytearray(len(native))
+    argb[0::4] = native[3::4]
+    argb[1::4] = native[2::4]
+    argb[2::4] = native[1::4]
+    argb[3::4] = native[0::4]
+    return ICON_SIZE, ICON_SIZE, bytes(argb)
+
+
+class StatusNotifierItem:
+    """Tray icon and menu published by the overlay process."""
+
+    def __init__(self, on_toggle_visibility: Callable[[], None],
+                 on_toggle_input: Callable[[], None],
+                 on_quit: Callable[[], None],
+                 on_registration_changed: Optional[Callable[[], None]] = None):
+        self._actions = {
+            _ITEM_TOGGLE: on_toggle_visibility,
+            _ITEM_CLICK_THROUGH: on_toggle_input,
+            _ITEM_QUIT: on_quit,
+        }
+        self._on_registration_changed = on_registration_changed
+        # Whether a tray host (via the watcher) currently shows the item
+        self.registered = False
+        self.bus_name = f"org.kde.StatusNotifierItem-{os.getpid()}-1"
+        self._connection: Optional[Gio.DBusConnection] = None
+        self._node = Gio.DBusNodeInfo.new_for_xml(INTROSPECTION_XML)
+        self._registrations: list[int] = []
+        self._owner_id = 0
+        self._watch_id = 0
+
+        self._status = None
+        self._summary = "No sessions"
+        self._tooltip = "No active sessions"
+        self._pixmap: Optional[tuple] = None
+        self._revision = 1
+
+    def start(self) -> None:
+        self._owner_id = Gio.bus_own_name(
+            Gio.BusType.SESSION, self.bus_name, Gio.BusNameOwnerFlags.NONE,
+            self._on_bus_acquired, None, None)
+
+    def stop(self) -> None:
+        if self._watch_id:
+            Gio.bus_unwatch_name(self._watch_id)
+            self._watch_id = 0
+        self._set_registered(False)
+        if self._connection is not None:
+            for registration in self._registrations:
+                self._connection.unregister_object(registration)
+        self._registrations = []
+        if self._owner_id:
+            Gio.bus_unown_name(self._owner_id)
+            self._owner_id = 0
+
+    def update(self, sessions) -> None:
+        """Reflect a new session set; cheap when the counts are unchanged."""
+        status = format_status(sessions)
+        key = (status['active'], status['idle'], status['stale'], status['tooltip'])
+        if key == self._status:
+            return
+        counts_changed = self._status is None or key[:3] != self._status[:3]
+        self._status = key
+
+        self._summary = (f"{status['active']} active · {status['idle']} idle · "
+                         f"{status['stale']} stale")
+        self._tooltip = status['tooltip']
+        if counts_changed:
+            self._pixmap = render_icon(status, status['class'])
+            self._emit(SNI_PATH, SNI_INTERFACE, "NewIcon")
+            self._emit(MENU_PATH, MENU_INTERFACE, "ItemsPropertiesUpdated", GLib.Variant(
+                "(a(ia{sv})a(ias))",
+                ([(_ITEM_SUMMARY, {'label': GLib.Variant("s", self._summary)})], [])))
+        self._emit(SNI_PATH, SNI_INTERFACE, "NewToolTip")
+
+    def _emit(self, path: str, interface: str, name: str,
+              parameters: Optional[GLib.Variant] = None) -> None:
+        if self._connection is None:
+            return
         try:
-            if parent_pid != 0:
-                os.kill(parent_pid, 0)
-        except ProcessLookupError:
-            print("Tray: Parent died, exiting.")
-            Gtk.main_quit()
-            return False
-        return True
-    
-    GLib.timeout_add(3000, check_parent)
-    
-    print("Tray: Entering main loop")
-    Gtk.main()
-
-if __name__ == "__main__":
-    p_pid = int(sys.argv[1]) if len(sys.argv) > 1 else 0
-    try:
-        run_tray(p_pid)
-    except Exception as e:
-        print(f"Tray runtime error: {e}")
-        sys.exit(1)
+            self._connection.emit_signal(None, path, interface, name, parameters)
+        except GLib.Error as e:
+            print(f"Tray signal {name} failed: {e.message}")
+
+    def _on_bus_acquired(self, connection: Gio.DBusConnection, _name: str) -> None:
+        self._connection = connection
+        for path, interface in ((SNI_PATH, SNI_INTERFACE), (MENU_PATH, MENU_INTERFACE)):
+            self._registrations.append(connection.register_object(
+                path, self._node.lookup_interface(interface),
+                self._on_method_call, self._on_get_property, None))
+        # Register now and again whenever the watcher restarts (e.g. the bar)
+        self._watch_id = Gio.bus_watch_name_on_connection(
+            connection, WATCHER_NAME, Gio.BusNameWatcherFlags.NONE,
+            self._on_watcher_appeared, self._on_watcher_vanished)
+
+    def _on_watcher_appeared(self, connection: Gio.DBusConnection, _name: str, _owner: str) -> None:
+        connection.call(
+            WATCHER_NAME, WATCHER_PATH, WATCHER_NAME, "RegisterStatusNotifierItem",
+            GLib.Variant("(s)", (self.bus_name,)), None, Gio.DBusCallFlags.NONE,
+            -1, None, self._on_registered)
+
+    def _on_watcher_vanished(self, _connection: Gio.DBusConnection, _name: str) -> None:
+        self._set_registered(False)
+
+    def _on_registered(self, connection: Gio.DBusConnection, result: Gio.AsyncResult) -> None:
+        try:
+            connection.call_finish(result)
+        except GLib.Error as e:
+            print(f"Tray registration failed: {e.message}")
+            return
+        self._set_registered(True)
+
+    def _set_registered(self, registered: bool) -> None:
+        if registered == self.registered:
+            return
+        self.registered = registered
+        if self._on_registration_changed is not None:
+            self._on_registration_changed()
+
+    # -- properties ---------------------------------------------------------
+
+    def _on_get_property(self, _connection, _sender, _path, interface: str,
+                         name: str) -> Optional[GLib.Variant]:
+        if interface == MENU_INTERFACE:
+            return {
+                'Version': GLib.Variant("u", 3),
+                'TextDirection': GLib.Variant("s", "ltr"),
+                'Status': GLib.Variant("s", "normal"),
+                'IconThemePath': GLib.Variant("as", []),
+            }.get(name)
+
+        if name == 'Category':
+            return GLib.Variant("s", "ApplicationStatus")
+        if name == 'Id':
+            return GLib.Variant("s", "opencode-activity-monitor")
+        if name == 'Title':
+            return GLib.Variant("s", f"OpenCode: {self._summary}")
+        if name == 'Status':
+            return GLib.Variant("s", "Active")
+        if name == 'IconName':
+            # Hosts prefer IconName when set, so leave it empty while a
+            # rendered pixmap is available
+            return GLib.Variant("s", "" if self._pixmap else FALLBACK_ICON)
+        if name == 'IconPixmap':
+            return GLib.Variant("a(iiay)", [self._pixmap] if self._pixmap else [])
+        if name == 'ToolTip':
+            return GLib.Variant("(sa(iiay)ss)", (
+                FALLBACK_ICON, [], f"OpenCode: {self._summary}", self._tooltip))
+        if name == 'ItemIsMenu':
+            return GLib.Variant("b", False)
+        if name == 'Menu':
+            return GLib.Variant("o", MENU_PATH)
+        return None
+
+    # -- methods ------------------------------------------------------------
+
+    def _on_method_call(self, _connection, _sender, _path, interface: str, method: str,
+                        parameters: GLib.Variant, invocation: Gio.DBusMethodInvocation) -> None:
+        if interface == SNI_INTERFACE:
+            if method == "Activate":
+                self._actions[_ITEM_TOGGLE]()
+            elif method == "SecondaryActivate":
+                self._actions[_ITEM_CLICK_THROUGH]()
+            invocation.return_value(None)
+            return
+
+        args = parameters.unpack()
+        if method == "GetLayout":
+            parent_id = args[0]
+            invocation.return_value(GLib.Variant(
+                "(u(ia{sv}av))", (self._revision, self._layout(parent_id))))
+        elif method == "GetGroupProperties":
+            items = self._items()
+            ids = args[0] or list(items)
+            invocation.return_value(GLib.Variant("(a(ia{sv}))", (
+                [(item_id, items[item_id]) for item_id in ids if item_id in items],)))
+        elif method == "GetProperty":
+            value = self._items().get(args[0], {}).get(args[1], GLib.Variant("s", ""))
+            invocation.return_value(GLib.Variant("(v)", (value,)))
+        elif method == "Event":
+            self._on_event(args[0], args[1])
+            invocation.return_value(None)
+        elif method == "EventGroup":
+            for item_id, event_id, _data, _timestamp in args[0]:
+                self._on_event(item_id, event_id)
+            invocation.return_value(GLib.Variant("(ai)", ([],)))
+        elif method == "AboutToShow":
+            invocation.return_value(GLib.Variant("(b)", (False,)))
+        elif method == "AboutToShowGroup":
+            invocation.return_value(GLib.Variant("(aiai)", ([], [])))
+        else:
+            invocation.return_dbus_error("org.freedesktop.DBus.Error.UnknownMethod", method)
+
+    def _items(self) -> dict:
+        return {
+            _ITEM_SUMMARY: {
+                'label': GLib.Variant("s", self._summary),
+                'enabled': GLib.Variant("b", False),
+            },
+            _ITEM_TOGGLE: {'label': GLib.Variant("s", "Show/Hide Overlay")},
+            _ITEM_CLICK_THROUGH: {'label': GLib.Variant("s", "Toggle Click-through")},
+            _ITEM_SEPARATOR: {'type': GLib.Variant("s", "separator")},
+            _ITEM_QUIT: {'label': GLib.Variant("s", "Exit")},
+        }
+
+    def _layout(self, parent_id: int) -> tuple:
+        items = self._items()
+        if parent_id in items:
+            return (parent_id, items[parent_id], [])
+        children = [GLib.Variant("(ia{sv}av)", (item_id, props, []))
+                    for item_id, props in items.items()]
+        return (0, {'children-display': GLib.Variant("s", "submenu")}, children)
+
+    def _on_event(self, item_id: int, event_id: str) -> None:
+        action = self._actions.get(item_id)
+        if event_id == "clicked" and action is not None:
+            action()
@@ -2,6 +2,8 @@
 OpenCode Session Activity Monitor - UI Components
 """
 
+from typing import Callable, Optional
+
 from gi.repository import Gtk, Gdk, Pango
 from src.config import CONFIG
 
@@ -59,6 +61,12 @@ def get_css() -> bytes:
         min-width: 40px;
     }}
     
+    .session-child {{
+        font-family: "JetBrains Mono", "Fira Code", monospace;
+        font-size: 0.6em;
+        color: rgba(255, 255, 255, 0.5);
+    }}
+
     .status-active {{ color: {colors["ok"]}; }}
     .status-idle {{ color: {colors["warning"]}; }}
     .status-stale {{ color: {colors["critical"]}; }}
@@ -70,53 +78,155 @@ def get_css() -> bytes:
         min-width: 45px;
     }}
 
-    .session-separator {{
+    .session-sparkline {{
+        font-family: "JetBrains Mono", "Fira Code", monospace;
+        font-size: 0.6em;
+        color: {colors["ok"]};
+        opacity: 0.7;
+    }}
+
+    .debug-footer {{
+        font-family: "JetBrains Mono", "Fira Code", monospace;
+        font-size: 0.6em;
+        color: rgba(255, 255, 255, 0.45);
+        padding: 0px 8px 6px 8px;
+    }}
+
+    .group-header {{
+        font-family: "JetBrains Mono", "Fira Code", monospace;
+        font-size: 0.62em;
+        color: {colors["provider"]};
+        opacity: {text_opacity};
+        background: transparent;
+        border: none;
         border-top: 1px solid rgba(100, 120, 140, 0.12);
+        border-radius: 0;
+        box-shadow: none;
+        padding: 2px 0px 0px 0px;
         margin-top: 2px;
-        margin-bottom: 2px;
-        min-height: 1px;
+        min-height: 0px;
     }}
     """.encode()
 
 
+_css_provider: Optional[Gtk.CssProvider] = None
+
+
 def load_css():
-    """Load CSS into GTK."""
+    """Load CSS into GTK, replacing the provider from any earlier call."""
+    global _css_provider
+    display = Gdk.Display.get_default()
     css_provider = Gtk.CssProvider()
     css_provider.load_from_data(get_css())
+    if _css_provider is not None:
+        Gtk.StyleContext.remove_provider_for_display(display, _css_provider)
     Gtk.StyleContext.add_provider_for_display(
-        Gdk.Display.get_default(),
+        display,
         css_provider,
         Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
     )
+    _css_provider = css_provider
+
+
+SPARK_LEVELS = "▁▂▃▄▅▆▇█"
+# Rates below this (clock ticks/s) draw as the baseline, so an idle session
+# doesn't fill its sparkline with scheduler noise
+SPARK_FLOOR = 10.0
+
+
+def sparkline(rates: tuple) -> str:
+    if not rates:
+        return ""
+    top = max(max(rates), SPARK_FLOOR)
+    last = len(SPARK_LEVELS) - 1
+    return "".join(SPARK_LEVELS[min(last, int(rate / top * last))] for rate in rates)
+
+
+class GroupHeader:
+    """A repository header; clicking it collapses or expands the group."""
+
+    def __init__(self, on_toggle: Callable[[], None]):
+        self.widget = Gtk.Button()
+        self.widget.set_has_frame(False)
+        self.widget.add_css_class("group-header")
+        self.label = Gtk.Label()
+        self.label.set_halign(Gtk.Align.START)
+        self.label.set_ellipsize(Pango.EllipsizeMode.END)
+        self.widget.set_child(self.label)
+        self.widget.connect("clicked", lambda _button: on_toggle())
+        self.values: Optional[tuple] = None
+
+    def update(self, name: str, count: int, collapsed: bool) -> None:
+        values = (name, count, collapsed)
+        if values != self.values:
+            arrow = "▸" if collapsed else "▾"
+            self.label.set_label(f"{arrow} {name} ({count})")
+            self.values = values
+
+
+class SessionRow:
+    """A session row whose labels can be updated in place."""
+
+    def __init__(self, project: str, status: str, time_ago: str, activity: tuple = (),
+                 busy_child: Optional[str] = None):
+        self.widget = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=4)
+
+        self.lbl_project = Gtk.Label(label=project)
+        self.lbl_project.set_halign(Gtk.Align.START)
+        self.lbl_project.add_css_class("session-project")
+        self.lbl_project.set_hexpand(True)
+        self.lbl_project.set_ellipsize(Pango.EllipsizeMode.END)
+        self.widget.append(self.lbl_project)
 
+        self.lbl_spark: Optional[Gtk.Label] = None
+        if CONFIG["appearance"]["sparkline"]:
+            self.lbl_spark = Gtk.Label(label=sparkline(activity))
+            self.lbl_spark.add_css_class("session-sparkline")
+            self.widget.append(self.lbl_spark)
 
-def make_separator() -> Gtk.Box:
-    box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
-    box.add_css_class("session-separator")
-    return box
+        # Which child process (build, tool call, LSP) keeps the session busy
+        self.lbl_child = Gtk.Label(label=busy_child or "")
+        self.lbl_child.add_css_class("session-child")
+        self.lbl_child.set_ellipsize(Pango.EllipsizeMode.END)
+        self.lbl_child.set_max_width_chars(12)
+        self.lbl_child.set_visible(bool(busy_child))
+        self.widget.append(self.lbl_child)
 
+        self.lbl_status = Gtk.Label(label=status)
+        self.lbl_status.add_css_class("session-status")
+        self.lbl_status.add_css_class(f"status-{status.lower()}")
+        self.lbl_status.set_xalign(1.0)  # Right align status to push against timer
+        self.widget.append(self.lbl_status)
 
-def make_session_row(project: str, status: str, time_ago: str) -> Gtk.Box:
-    row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=4)
+        self.lbl_time = Gtk.Label(label=time_ago or " ")
+        self.lbl_time.add_css_class("session-time")
+        # Compact width - "23h59m" fits in ~40-45px at this font size
+        self.lbl_time.set_size_request(45, -1)
+        self.lbl_time.set_xalign(1.0)
+        self.widget.append(self.lbl_time)
 
-    lbl_project = Gtk.Label(label=project)
-    lbl_project.set_halign(Gtk.Align.START)
-    lbl_project.add_css_class("session-project")
-    lbl_project.set_hexpand(True)
-    lbl_project.set_ellipsize(Pango.EllipsizeMode.END)
-    row.append(lbl_project)
+        self.values = (project, status, time_ago, activity, busy_child)
 
-    lbl_status = Gtk.Label(label=status)
-    lbl_status.add_css_class("session-status")
-    lbl_status.add_css_class(f"status-{status.lower()}")
-    lbl_status.set_xalign(1.0)  # Right align status to push against timer
-    row.append(lbl_status)
+    def update(self, project: str, status: str, time_ago: str, activity: tuple = (),
+               busy_child: Optional[str] = None) -> None:
+        """Touch only the labels whose values changed."""
+        old_project, old_status, old_time, old_activity, old_child = self.values
+        if project != old_project:
+            self.lbl_project.set_label(project)
+        if status != old_status:
+            self.lbl_status.set_label(status)
+            self.lbl_status.remove_css_class(f"status-{old_status.lower()}")
+            self.lbl_status.add_css_class(f"status-{status.lower()}")
+        if time_ago != old_time:
+            self.lbl_time.set_label(time_ago or " ")
+        if self.lbl_spark is not None and activity != old_activity:
+            self.lbl_spark.set_label(sparkline(activity))
+        if busy_child != old_child:
+            self.lbl_child.set_label(busy_child or "")
+            self.lbl_child.set_visible(bool(busy_child))
+        self.values = (project, status, time_ago, activity, busy_child)
 
-    lbl_time = Gtk.Label(label=time_ago or " ")
-    lbl_time.add_css_class("session-time")
-    # Compact width - "23h59m" fits in ~40-45px at this font size
-    lbl_time.set_size_request(45, -1)
-    lbl_time.set_xalign(1.0) 
-    row.append(lbl_time)
 
-    return row
+def make_session_row(project: str, status: str, time_ago: str, activity: tuple = (),
+                     busy_child: Optional[str] = None) -> Gtk.Box:
+    return SessionRow(project, status, time_ago, activity, busy_child).widget
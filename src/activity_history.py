@@ -0,0 +1,106 @@
+"""Fixed-size CPU-rate history per process.
+
+All samples live in one flat `array('f')` of `capacity` floats per slot; a
+PID holds a slot from its first sample until it is released, and freed
+slots are reused. A session's memory cost is the same whether it has run
+for a minute or a month.
+
+Rates are computed in a plain per-session loop; the gain over a dict of
+deques is memory (no per-sample float objects or per-PID containers),
+not speed.
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+# Samples closer together than this give meaningless rates
+_MIN_SAMPLE_INTERVAL = 0.5
+
+
+class ActivityHistory:
+    """Ring buffers of CPU rate (clock ticks per second), one per PID."""
+
+    def __init__(self, capacity: int = 20):
+        self.capacity = capacity
+        self._slots: Dict[int, int] = {}
+        self._free: List[int] = []
+        # Per slot: ring of rates, then the write position, sample count and
+        # the raw reading the next rate is computed against
+        self._rates = array('f')
+        self._head = array('I')
+        self._count = array('I')
+        self._last_cpu = array('d')
+        self._last_time = array('d')
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _slot(self, pid: int) -> int:
+        slot = self._slots.get(pid)
+        if slot is not None:
+            return slot
+        if self._free:
+            # Old samples are left in place; the count hides them
+            slot = self._free.pop()
+        else:
+            slot = len(self._head)
+            self._rates.extend(array('f', bytes(4 * self.capacity)))
+            self._head.append(0)
+            self._count.append(0)
+            self._last_cpu.append(0.0)
+            self._last_time.append(0.0)
+        self._head[slot] = 0
+        self._count[slot] = 0
+        self._last_time[slot] = 0.0
+        self._slots[pid] = slot
+        return slot
+
+    def record(self, samples: Iterable[Tuple[int, float, float]]) -> None:
+        """Fold one batch of (pid, cumulative cpu ticks, sampled_at) readings.
+
+        Each reading is handled in turn, writing into the flat arrays in place.
+        """
+        batch = [(self._slot(pid), cpu, at) for pid, cpu, at in samples]
+        last_cpu, last_time = self._last_cpu, self._last_time
+        rates, head, count = self._rates, self._head, self._count
+        capacity = self.capacity
+
+        for slot, cpu, at in batch:
+            previous = last_time[slot]
+            if previous == 0.0:
+                last_cpu[slot] = cpu
+                last_time[slot] = at
+                continue
+            elapsed = at - previous
+            if elapsed < _MIN_SAMPLE_INTERVAL:
+                continue
+            rate = max(0.0, cpu - last_cpu[slot]) / elapsed
+            position = head[slot]
+            rates[slot * capacity + position] = rate
+            head[slot] = (position + 1) % capacity
+            if count[slot] < capacity:
+                count[slot] += 1
+            last_cpu[slot] = cpu
+            last_time[slot] = at
+
+    def rates(self, pid: int) -> Tuple[float, ...]:
+        """Recorded rates for a PID, oldest first."""
+        slot = self._slots.get(pid)
+        if slot is None:
+            return ()
+        base = slot * self.capacity
+        n = self._count[slot]
+        head = self._head[slot]
+        ring = self._rates[base:base + self.capacity]
+        if n < self.capacity:
+            return tuple(ring[:n])
+        return tuple(ring[head:]) + tuple(ring[:head])
+
+    def release(self, pid: int) -> None:
+        slot = self._slots.pop(pid, None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def clear(self) -> None:
+        self._slots.clear()
+        self._free = list(range(len(self._head)))
@@ -0,0 +1,121 @@
+"""Bounded stale-while-revalidate cache."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+class SWRCache:
+    """LRU cache with a size cap that serves expired entries while they refresh.
+
+    Expired entries are returned immediately and their keys handed to
+    `refresh` on a background thread, batched so one refresh call can load
+    many keys at once. `refresh` is expected to call `put` for the keys it
+    manages to load.
+    """
+
+    def __init__(self, maxsize: int, ttl: float,
+                 refresh: Callable[[List[Hashable]], None]):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._refresh = refresh
+        # key -> (value, expires_at)
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending: Set[Hashable] = set()
+        self._in_flight: Set[Hashable] = set()
+        self._wakeup = threading.Condition(self._lock)
+        self._worker: Optional[threading.Thread] = None
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, bool]]:
+        """Return (value, is_stale), or None on a miss.
+
+        Stale entries are queued for a background refresh.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            value, expires_at = entry
+            if time.monotonic() < expires_at:
+                self.hits += 1
+                return (value, False)
+            self.stale_hits += 1
+            self._schedule_locked([key])
+            return (value, True)
+
+    def peek(self, key: Hashable) -> Optional[Tuple[Any, bool]]:
+        """Like get, but without touching LRU order, counters or refreshes."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            return (value, time.monotonic() >= expires_at)
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, optionally with a TTL other than the default."""
+        with self._lock:
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def schedule_refresh(self, keys: Iterable[Hashable]) -> None:
+        """Queue keys for a background refresh."""
+        with self._lock:
+            self._schedule_locked(keys)
+
+    def _schedule_locked(self, keys: Iterable[Hashable]) -> None:
+        self._pending.update(k for k in keys if k not in self._in_flight)
+        if not self._pending:
+            return
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="swr-cache-refresh", daemon=True)
+            self._worker.start()
+        self._wakeup.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wakeup.wait()
+                keys = list(self._pending)
+                self._pending.clear()
+                self._in_flight.update(keys)
+            try:
+                self._refresh(keys)
+            except Exception as e:
+                print(f"Cache refresh error: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight.difference_update(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
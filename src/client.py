@@ -0,0 +1,128 @@
+"""Client side of the collector daemon's snapshot socket."""
+
+import dataclasses
+import json
+import socket
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from src import protocol
+from src.collector import EMPTY_SNAPSHOT, Snapshot
+
+_RECONNECT_DELAY = 2.0
+
+
+class RemoteCollector:
+    """Drop-in replacement for `Collector` fed by a daemon over its socket.
+
+    Exposes the same `snapshot`, `add_listener`, `start` and
+    `request_refresh` surface, and reconnects if the daemon restarts.
+    Disconnect listeners hear about every dropped connection and failed
+    reconnect, so a front end can take over collecting instead.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else protocol.get_socket_path()
+        self._listeners: List[Callable[[Snapshot], None]] = []
+        self._disconnect_listeners: List[Callable[[], None]] = []
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.snapshot: Snapshot = EMPTY_SNAPSHOT
+        # Set while a connection to the daemon is up
+        self.connected = threading.Event()
+
+    def add_listener(self, callback: Callable[[Snapshot], None]) -> None:
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[Snapshot], None]) -> None:
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def add_disconnect_listener(self, callback: Callable[[], None]) -> None:
+        self._disconnect_listeners.append(callback)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="snapshot-client", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def request_refresh(self) -> None:
+        self.send({'cmd': 'refresh'})
+
+    def send(self, message: dict) -> bool:
+        """Send a command to the daemon. Returns False if not connected."""
+        sock = self._sock
+        if sock is None:
+            return False
+        try:
+            with self._send_lock:
+                sock.sendall(protocol.encode(message))
+            return True
+        except OSError:
+            return False
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(str(self.path))
+            except OSError:
+                sock.close()
+                self._notify_disconnected()
+                self._stopped.wait(_RECONNECT_DELAY)
+                continue
+
+            self._sock = sock
+            self.connected.set()
+            try:
+                self._read_loop(sock)
+            except OSError:
+                pass
+            finally:
+                self.connected.clear()
+                self._sock = None
+                sock.close()
+            self._notify_disconnected()
+            self._stopped.wait(_RECONNECT_DELAY)
+
+    def _notify_disconnected(self) -> None:
+        if self._stopped.is_set():
+            return
+        for callback in list(self._disconnect_listeners):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Disconnect listener error: {e}")
+
+    def _read_loop(self, sock: socket.socket) -> None:
+        for line in sock.makefile("rb"):
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            snapshot = protocol.snapshot_from_message(message) if isinstance(message, dict) else None
+            if snapshot is None:
+                continue
+            # Renumber locally so a restarted daemon doesn't look like old data
+            snapshot = dataclasses.replace(snapshot, seq=self.snapshot.seq + 1)
+            self.snapshot = snapshot
+            for callback in list(self._listeners):
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    print(f"Snapshot listener error: {e}")
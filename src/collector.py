@@ -0,0 +1,98 @@
+"""Persistent background collector publishing immutable session snapshots."""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from src import opencode_data
+from src.opencode_data import Session
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One completed collection. Never mutated after publication."""
+    seq: int
+    sessions: Tuple[Session, ...]
+    collected_at: float
+    duration: float
+
+
+EMPTY_SNAPSHOT = Snapshot(seq=0, sessions=(), collected_at=0.0, duration=0.0)
+
+
+class Collector:
+    """Runs `fetch_data` on a single long-lived thread.
+
+    Refresh requests are coalesced: asking for a refresh while one is already
+    pending or running results in at most one further collection. Readers
+    take `collector.snapshot`, which is replaced atomically, so no locking
+    is needed on the consumer side.
+    """
+
+    def __init__(self, fetch: Callable[[], List[Session]] = opencode_data.fetch_data):
+        self._fetch = fetch
+        self._wakeup = threading.Event()
+        self._published = threading.Condition()
+        self._stopped = threading.Event()
+        self._listeners: List[Callable[[Snapshot], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self.snapshot: Snapshot = EMPTY_SNAPSHOT
+
+    def add_listener(self, callback: Callable[[Snapshot], None]) -> None:
+        """Call back (on the collector thread) after each new snapshot."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[Snapshot], None]) -> None:
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="collector", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+
+    def request_refresh(self) -> None:
+        """Ask for a collection; coalesces with any already pending."""
+        self._wakeup.set()
+
+    def wait_for_snapshot(self, after_seq: int, timeout: Optional[float] = None) -> Snapshot:
+        """Block until a snapshot newer than after_seq exists (or timeout)."""
+        with self._published:
+            self._published.wait_for(lambda: self.snapshot.seq > after_seq, timeout)
+            return self.snapshot
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            if self._stopped.is_set():
+                return
+            self._wakeup.clear()
+
+            started = time.monotonic()
+            try:
+                sessions = tuple(self._fetch())
+            except Exception as e:
+                print(f"Collector error: {e}")
+                continue
+
+            with self._published:
+                self.snapshot = Snapshot(
+                    seq=self.snapshot.seq + 1,
+                    sessions=sessions,
+                    collected_at=time.time(),
+                    duration=time.monotonic() - started,
+                )
+                self._published.notify_all()
+            for callback in list(self._listeners):
+                try:
+                    callback(self.snapshot)
+                except Exception as e:
+                    print(f"Collector listener error: {e}")
@@ -4,11 +4,7 @@ OpenCode Session Activity Monitor - Configuration loading
 
 import sys
 from pathlib import Path
-
-if sys.version_info >= (3, 11):
-    import tomllib
-else:
-    import tomli as tomllib
+from typing import List, Optional, Set
 
 from src.platform import get_config_dir
 
@@ -16,12 +12,15 @@ from src.platform import get_config_dir
 DEFAULT_CONFIG = {
     "monitor": {
         "refresh_interval_ms": 5000,
+        "min_refresh_interval_ms": 2000,
+        "max_refresh_interval_ms": 60000,
     },
     "appearance": {
         "background_opacity": 0.55,
         "text_opacity": 0.85,
         "width": 400,
         "corner_radius": 10,
+        "sparkline": True,
     },
     "position": {
         "anchor": "top-left",
@@ -40,6 +39,20 @@ DEFAULT_CONFIG = {
         "provider": "#64b5f6",
         "background": "10, 12, 16",
     },
+    "history": {
+        "enabled": True,
+        "retention_days": 90,
+    },
+    "metrics": {
+        "enabled": False,
+        "listen": "127.0.0.1:9464",
+    },
+    "debug": {
+        "timings": False,
+        "timing_log_interval_s": 60,
+        "trace": False,
+        "trace_buffer_events": 20000,
+    },
 }
 
 
@@ -54,24 +67,113 @@ def deep_merge(base: dict, override: dict) -> dict:
     return result
 
 
-def load_config() -> dict:
-    """Load config from TOML."""
-    config_paths = [
+def _config_paths() -> List[Path]:
+    return [
         get_config_dir() / "config.toml",
         Path(__file__).parent.parent / "config.toml",
         Path(__file__).parent / "config.toml",
     ]
-    
-    for config_path in config_paths:
+
+
+def get_config_path() -> Optional[Path]:
+    """The config.toml in effect, if any."""
+    for config_path in _config_paths():
+        if config_path.exists():
+            return config_path
+    return None
+
+
+def _read_config(config_path: Path) -> dict:
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib
+
+    with open(config_path, "rb") as f:
+        return deep_merge(DEFAULT_CONFIG, tomllib.load(f))
+
+
+def load_config() -> dict:
+    """Load config from TOML."""
+    for config_path in _config_paths():
         if config_path.exists():
             try:
-                with open(config_path, "rb") as f:
-                    user_config = tomllib.load(f)
-                return deep_merge(DEFAULT_CONFIG, user_config)
+                return _read_config(config_path)
             except Exception as e:
                 print(f"Error: {e}")
-    
-    return DEFAULT_CONFIG
+
+    # A copy, so reload_config never mutates the defaults
+    return deep_merge(DEFAULT_CONFIG, {})
+
+
+def reload_config() -> Set[str]:
+    """Re-read config.toml into CONFIG in place; return the changed sections.
+
+    Modules hold references to the CONFIG dict, so it is updated rather than
+    replaced. A file that fails to parse leaves the current config alone.
+    """
+    config = globals().get("CONFIG")
+    if config is None:
+        __getattr__("CONFIG")
+        return set()
+
+    config_path = get_config_path()
+    try:
+        new = _read_config(config_path) if config_path else deep_merge(DEFAULT_CONFIG, {})
+    except Exception as e:
+        print(f"Config not reloaded: {e}")
+        return set()
+
+    changed = {section for section in new.keys() | config.keys()
+               if new.get(section) != config.get(section)}
+    for section in changed:
+        if section in new:
+            config[section] = new[section]
+        else:
+            del config[section]
+    return changed
+
+
+class ConfigWatcher:
+    """Polls config.toml and reloads it when it changes.
+
+    check() is cheap (one stat), so callers run it on their own schedule:
+    the overlay from a GLib timeout, the daemon from its refresh loop.
+    """
+
+    def __init__(self):
+        self._signature = self._stat()
+
+    @staticmethod
+    def _stat() -> Optional[tuple]:
+        config_path = get_config_path()
+        if config_path is None:
+            return None
+        try:
+            st = config_path.stat()
+        except OSError:
+            return None
+        return (str(config_path), st.st_mtime_ns, st.st_size)
+
+    def check(self) -> Set[str]:
+        """Reload if the file changed; return the sections that changed."""
+        signature = self._stat()
+        if signature == self._signature:
+            return set()
+        self._signature = signature
+        try:
+            return reload_config()
+        except Exception as e:
+            # Callers poll from timers and refresh loops that must not die
+            print(f"Config not reloaded: {e}")
+            return set()
 
 
-CONFIG = load_config()
+def __getattr__(name: str):
+    # CONFIG is loaded on first access rather than at import time, so merely
+    # importing this module (or modules that import it) stays cheap.
+    if name == "CONFIG":
+        config = load_config()
+        globals()["CONFIG"] = config
+        return config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
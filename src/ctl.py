@@ -0,0 +1,74 @@
+"""Send a control command to the running collector (daemon or overlay).
+
+    python3 -m src.ctl refresh
+    python3 -m src.ctl trace start|stop|clear|status
+    python3 -m src.ctl trace dump [path]
+    python3 -m src.ctl diagnostics [path] [--tracemalloc | --stop]
+"""
+
+import argparse
+import json
+import socket
+import sys
+from typing import List, Optional
+
+from src import protocol
+
+
+def build_request(args: List[str]) -> dict:
+    command, *rest = args
+    request: dict = {'cmd': command}
+    if command == 'trace':
+        request['action'] = rest[0] if rest else 'status'
+        if len(rest) > 1:
+            request['path'] = rest[1]
+    elif command == 'diagnostics':
+        flags = {'--tracemalloc': 'tracemalloc', '--stop': 'stop'}
+        for flag, key in flags.items():
+            if flag in rest:
+                request[key] = True
+        rest = [arg for arg in rest if arg not in flags]
+        if rest:
+            request['path'] = rest[0]
+    return request
+
+
+def send_command(request: dict, timeout: float = 10.0) -> Optional[dict]:
+    """Send one command and wait for its response (None if none expected)."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    sock.connect(str(protocol.get_socket_path()))
+    try:
+        sock.sendall(protocol.encode(request))
+        if request['cmd'] == 'refresh':
+            return None
+        for line in sock.makefile("rb"):
+            message = json.loads(line)
+            if message.get('type') == 'response' and message.get('cmd') == request['cmd']:
+                return message
+    finally:
+        sock.close()
+    return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Control the running activity monitor")
+    parser.add_argument("command", nargs="+", help="command and arguments")
+    args = parser.parse_args()
+
+    try:
+        response = send_command(build_request(args.command))
+    except OSError as e:
+        print(f"Cannot reach the collector at {protocol.get_socket_path()}: {e}")
+        return 1
+
+    if response is not None:
+        response.pop('type', None)
+        print(json.dumps(response, indent=2))
+        if 'error' in response:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
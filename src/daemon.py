@@ -0,0 +1,401 @@
+"""Headless collector daemon serving snapshots over a Unix socket.
+
+Run with `python3 -m src.daemon`. The overlay, tray and status-bar scripts
+connect as clients, so any number of consumers share a single scan.
+"""
+
+import argparse
+import json
+import os
+import selectors
+import signal
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+from src import protocol, timing
+from src.collector import Collector, Snapshot
+from src.config import CONFIG, ConfigWatcher
+from src.diagnostics import handle_diagnostics_command
+from src.history import start_history_writer
+from src.metrics import start_metrics_server
+from src.scheduler import AdaptiveInterval
+from src.tracing import handle_trace_command
+
+# Clients that stop reading are dropped once this much output is queued
+_MAX_CLIENT_BUFFER = 1024 * 1024
+# How often (seconds) config.toml is checked for changes
+CONFIG_POLL_INTERVAL = 2.0
+# How long a client waits for its first connection before giving up
+CONNECT_TIMEOUT = 5.0
+
+CommandHandler = Callable[[dict], Optional[dict]]
+
+
+class _Client:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+
+
+class SnapshotServer:
+    """Broadcast collector snapshots to socket clients and serve commands.
+
+    Snapshots are pushed to every client on connect and whenever the session
+    set changes. Additional commands can be added with `register_command`.
+    """
+
+    def __init__(self, collector: Collector, path: Optional[Path] = None,
+                 min_refresh_interval: Optional[float] = None):
+        self.collector = collector
+        self.path = Path(path) if path else protocol.get_socket_path()
+        # None follows [monitor] min_refresh_interval_ms, including live reloads
+        self._min_refresh_interval = min_refresh_interval
+
+        self._selector = selectors.DefaultSelector()
+        self._listener: Optional[socket.socket] = None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._clients: Dict[socket.socket, _Client] = {}
+        self._last_sessions: Optional[tuple] = None
+        self._broadcast_pending = False
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._commands: Dict[str, CommandHandler] = {
+            'refresh': self._cmd_refresh,
+            'snapshot': self._cmd_snapshot,
+            'trace': handle_trace_command,
+            'diagnostics': handle_diagnostics_command,
+        }
+
+    def register_command(self, name: str, handler: CommandHandler) -> None:
+        """Handle {"cmd": name, ...}; a returned dict is sent back."""
+        self._commands[name] = handler
+
+    @property
+    def min_refresh_interval(self) -> float:
+        if self._min_refresh_interval is not None:
+            return self._min_refresh_interval
+        return CONFIG["monitor"]["min_refresh_interval_ms"] / 1000
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def start(self) -> None:
+        """Bind the socket and serve on a background thread.
+
+        Raises OSError if another live server already owns the socket.
+        """
+        if self.path.exists():
+            if protocol.socket_is_live(self.path):
+                raise OSError(f"{self.path} is already being served")
+            self.path.unlink()
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(str(self.path))
+        os.chmod(self.path, 0o600)
+        listener.listen(16)
+        listener.setblocking(False)
+        self._listener = listener
+
+        self._wake_r.setblocking(False)
+        self._selector.register(listener, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+
+        self.collector.add_listener(self._on_snapshot)
+        self._thread = threading.Thread(target=self._run, name="snapshot-server", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self.collector.remove_listener(self._on_snapshot)
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    def _on_snapshot(self, snapshot: Snapshot) -> None:
+        self._broadcast_pending = True
+        self._wake()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            for key, mask in self._selector.select():
+                sock = key.fileobj
+                if sock is self._listener:
+                    self._accept()
+                elif sock is self._wake_r:
+                    try:
+                        self._wake_r.recv(4096)
+                    except BlockingIOError:
+                        pass
+                else:
+                    client = self._clients.get(sock)
+                    if client is None:
+                        continue
+                    if mask & selectors.EVENT_READ:
+                        self._read(client)
+                    if mask & selectors.EVENT_WRITE and sock in self._clients:
+                        self._flush(client)
+
+            if self._broadcast_pending:
+                self._broadcast_pending = False
+                self._broadcast_if_changed()
+
+        for client in list(self._clients.values()):
+            self._drop(client)
+        self._selector.close()
+        if self._listener is not None:
+            self._listener.close()
+
+    def _accept(self) -> None:
+        try:
+            sock, _ = self._listener.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        client = _Client(sock)
+        self._clients[sock] = client
+        self._selector.register(sock, selectors.EVENT_READ)
+        snapshot = self.collector.snapshot
+        if snapshot.seq > 0:
+            self._send(client, protocol.snapshot_to_message(snapshot))
+
+    def _broadcast_if_changed(self) -> None:
+        snapshot = self.collector.snapshot
+        if snapshot.sessions == self._last_sessions:
+            return
+        self._last_sessions = snapshot.sessions
+        data = protocol.encode(protocol.snapshot_to_message(snapshot))
+        for client in list(self._clients.values()):
+            self._send_raw(client, data)
+
+    def _read(self, client: _Client) -> None:
+        try:
+            data = client.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(client)
+            return
+
+        client.inbuf += data
+        while b"\n" in client.inbuf:
+            line, _, rest = bytes(client.inbuf).partition(b"\n")
+            client.inbuf = bytearray(rest)
+            self._handle_line(client, line)
+            if client.sock not in self._clients:
+                return
+        if len(client.inbuf) > _MAX_CLIENT_BUFFER:
+            self._drop(client)
+
+    def _handle_line(self, client: _Client, line: bytes) -> None:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return
+        if not isinstance(request, dict):
+            return
+        name = request.get('cmd')
+        handler = self._commands.get(name)
+        if handler is None:
+            self._send(client, {'type': 'response', 'cmd': name, 'error': 'unknown command'})
+            return
+        try:
+            response = handler(request)
+        except Exception as e:
+            response = {'error': str(e)}
+        if response is not None:
+            self._send(client, {'type': 'response', 'cmd': name, **response})
+
+    def _cmd_refresh(self, request: dict) -> Optional[dict]:
+        # Many clients asking at once must not multiply the scan rate
+        age = time.time() - self.collector.snapshot.collected_at
+        if age >= self.min_refresh_interval:
+            self.collector.request_refresh()
+        return None
+
+    def _cmd_snapshot(self, request: dict) -> Optional[dict]:
+        return protocol.snapshot_to_message(self.collector.snapshot)
+
+    def _send(self, client: _Client, message: dict) -> None:
+        self._send_raw(client, protocol.encode(message))
+
+    def _send_raw(self, client: _Client, data: bytes) -> None:
+        client.outbuf += data
+        if len(client.outbuf) > _MAX_CLIENT_BUFFER:
+            self._drop(client)
+            return
+        self._flush(client)
+
+    def _flush(self, client: _Client) -> None:
+        try:
+            sent = client.sock.send(client.outbuf)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._drop(client)
+            return
+        del client.outbuf[:sent]
+        events = selectors.EVENT_READ
+        if client.outbuf:
+            events |= selectors.EVENT_WRITE
+        self._selector.modify(client.sock, events)
+
+    def _drop(self, client: _Client) -> None:
+        self._clients.pop(client.sock, None)
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+
+
+def daemon_available(path: Optional[Path] = None) -> bool:
+    """Whether a collector is already serving on the socket."""
+    return protocol.socket_is_live(Path(path) if path else protocol.get_socket_path())
+
+
+def start_shared_collector() -> tuple:
+    """Get a collector for a front end, sharing one scan between consumers.
+
+    Connects to a running daemon if there is one. Otherwise starts a local
+    collector and serves it on the socket so other clients can attach.
+    Metrics and history are only started by the process that owns the
+    socket, so they never run twice. Returns (collector, server or None).
+    """
+    from src.client import RemoteCollector
+
+    if daemon_available():
+        collector: Union[Collector, RemoteCollector] = RemoteCollector()
+        return collector, None
+
+    collector = Collector()
+    server = SnapshotServer(collector)
+    try:
+        server.start()
+    except OSError as e:
+        if daemon_available():
+            # Another process took the socket after the check above
+            return RemoteCollector(), None
+        print(f"Snapshot server disabled: {e}")
+        return collector, None
+    start_metrics_server(collector)
+    start_history_writer(collector)
+    return collector, server
+
+
+def _interval_from_config() -> AdaptiveInterval:
+    monitor = CONFIG["monitor"]
+    return AdaptiveInterval(
+        monitor["refresh_interval_ms"],
+        monitor["min_refresh_interval_ms"],
+        monitor["max_refresh_interval_ms"],
+    )
+
+
+def drive(collector: Collector, stop: threading.Event) -> None:
+    """Request collections on the adaptive schedule until stop is set.
+
+    config.toml is checked while waiting; a changed [monitor] section takes
+    effect immediately.
+    """
+    interval = _interval_from_config()
+    watcher = ConfigWatcher()
+    seq = collector.snapshot.seq
+    while not stop.is_set():
+        collector.request_refresh()
+        snapshot = collector.wait_for_snapshot(seq, timeout=30)
+        seq = snapshot.seq
+        delay = interval.next_interval(snapshot.sessions) / 1000
+        if _wait_for_next(delay, stop, watcher):
+            interval = _interval_from_config()
+
+
+def follow(collector, stop: threading.Event) -> None:
+    """Keep a RemoteCollector fresh until stop is set or the connection drops.
+
+    The serving process may not collect on its own (a hidden overlay does
+    not), so refreshes are requested on the same adaptive schedule; the
+    server rate-limits them.
+    """
+    if not collector.connected.wait(CONNECT_TIMEOUT):
+        return
+    interval = _interval_from_config()
+    watcher = ConfigWatcher()
+    alive = collector.connected.is_set
+    while not stop.is_set() and alive():
+        collector.request_refresh()
+        delay = interval.next_interval(collector.snapshot.sessions) / 1000
+        if _wait_for_next(delay, stop, watcher, alive):
+            interval = _interval_from_config()
+
+
+def _wait_for_next(delay: float, stop: threading.Event, watcher: ConfigWatcher,
+                   alive: Callable[[], bool] = lambda: True) -> bool:
+    """Sleep up to delay seconds, checking config.toml meanwhile.
+
+    Returns True (early) if the [monitor] section changed.
+    """
+    deadline = time.monotonic() + delay
+    while not stop.is_set() and alive():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        stop.wait(min(remaining, CONFIG_POLL_INTERVAL))
+        if "monitor" in watcher.check():
+            return True
+    return False
+
+
+def run(socket_path: Optional[Path] = None) -> None:
+    """Collect on an adaptive schedule and serve until SIGINT/SIGTERM."""
+    timing.configure()
+    collector = Collector()
+    server = SnapshotServer(collector, socket_path)
+    server.start()
+    metrics = start_metrics_server(collector)
+    history = start_history_writer(collector)
+    collector.start()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    print(f"Serving snapshots on {server.path}")
+    try:
+        drive(collector, stop)
+    finally:
+        if metrics is not None:
+            metrics.stop()
+        server.stop()
+        collector.stop()
+        if history is not None:
+            collector.remove_listener(history)
+            history.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", type=Path, default=None,
+                        help=f"socket path (default: {protocol.get_socket_path()})")
+    args = parser.parse_args()
+    run(args.socket)
+
+
+if __name__ == "__main__":
+    main()
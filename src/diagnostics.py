@@ -0,0 +1,151 @@
+"""On-demand memory diagnostics for the long-running monitor.
+
+Triggered through the collector socket:
+
+    python3 -m src.ctl diagnostics [path] [--tracemalloc | --stop]
+
+and written as JSON (RSS, tracemalloc top allocators, cache sizes and
+anything front ends register, such as GTK widget counts).
+"""
+
+import gc
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from src import opencode_data
+from src.platform import get_cache_dir
+from src.tracing import TRACER
+
+TOP_ALLOCATORS = 25
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+
+def register_provider(name: str, provider: Callable[[], dict]) -> None:
+    """Add a section to diagnostics dumps.
+
+    Providers are called from the socket thread, so they must only read
+    plain Python state (e.g. counts cached by the GTK main loop).
+    """
+    _providers[name] = provider
+
+
+def get_memory_usage() -> Dict[str, Optional[int]]:
+    """Current and peak resident set size in KiB."""
+    usage: Dict[str, Optional[int]] = {'rss_kib': None, 'peak_rss_kib': None}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    usage['rss_kib'] = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    usage['peak_rss_kib'] = int(line.split()[1])
+    except OSError:
+        pass
+    if usage['peak_rss_kib'] is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, KiB elsewhere
+        usage['peak_rss_kib'] = peak // 1024 if sys.platform == "darwin" else peak
+    return usage
+
+
+def _top_allocators(limit: int) -> list:
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    return [{
+        'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+        'size_kib': round(stat.size / 1024, 1),
+        'count': stat.count,
+    } for stat in snapshot.statistics("lineno")[:limit]]
+
+
+def collect(start_tracemalloc: bool = False) -> dict:
+    """Gather a diagnostics report.
+
+    Top allocators need tracemalloc, which is off by default because it
+    slows every allocation; with start_tracemalloc it is switched on so that
+    a later dump can report them.
+    """
+    if start_tracemalloc and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    report: dict = {
+        'timestamp': time.time(),
+        'pid': os.getpid(),
+        'memory': get_memory_usage(),
+        'gc': {
+            'counts': gc.get_count(),
+            'objects': len(gc.get_objects()),
+            'garbage': len(gc.garbage),
+        },
+        'threads': sorted(t.name for t in threading.enumerate()),
+        'caches': opencode_data.get_state_sizes(),
+        'title_cache': opencode_data.get_title_cache_stats(),
+        'trace_events': len(TRACER),
+    }
+
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        report['tracemalloc'] = {
+            'current_kib': round(current / 1024, 1),
+            'peak_kib': round(peak / 1024, 1),
+            'top': _top_allocators(TOP_ALLOCATORS),
+        }
+    else:
+        report['tracemalloc'] = None
+
+    for name, provider in list(_providers.items()):
+        try:
+            report[name] = provider()
+        except Exception as e:
+            report[name] = {'error': str(e)}
+
+    return report
+
+
+def dump(path: Optional[Path] = None, start_tracemalloc: bool = False,
+         stop_tracemalloc: bool = False) -> Path:
+    """Write a diagnostics report as JSON and return its path.
+
+    With stop_tracemalloc, tracing is switched off once the report (and its
+    allocators) has been written.
+    """
+    if path is None:
+        path = get_cache_dir() / f"diagnostics-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(path, "w") as f:
+            json.dump(collect(start_tracemalloc), f, indent=2)
+    finally:
+        if stop_tracemalloc:
+            tracemalloc.stop()
+    return path
+
+
+def toggle() -> Optional[Path]:
+    """Start tracemalloc, or if it is running, dump a report and stop it.
+
+    Returns the report's path, or None when tracing was only started.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        return None
+    return dump(stop_tracemalloc=True)
+
+
+def handle_diagnostics_command(request: dict) -> dict:
+    """Control-channel handler for {"cmd": "diagnostics", ...}."""
+    path = dump(request.get('path'), bool(request.get('tracemalloc')),
+                bool(request.get('stop')))
+    return {'path': str(path), 'memory': get_memory_usage(),
+            'tracing': tracemalloc.is_tracing()}
@@ -0,0 +1,330 @@
+"""Persistent per-session status history.
+
+The collector appends one fixed-size record per session per snapshot to a
+memory-mapped segment file per (UTC) day:
+
+    <data dir>/history/2026-10-17.seg
+    <data dir>/history/names.json      project/agent name table
+
+Aggregate it with
+
+    python3 -m src.history [--since 7d] [--until 2026-10-17] [--by project|agent]
+
+Scans use numpy (see requirements.txt) when it is installed and fall back
+to struct otherwise; the fallback only unpacks records inside the queried
+range, but a full month takes about a second.
+"""
+
+import argparse
+import datetime
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.platform import get_data_dir
+
+MAGIC = b"OAMHIST1"
+# magic, committed record count
+HEADER = struct.Struct("<8sQ")
+# collected_at, project id, agent id, status, seconds the sample stands for
+RECORD = struct.Struct("<dHHB3xf")
+STATUSES = ("active", "idle", "stale")
+
+_INITIAL_RECORDS = 4096
+# A sample never accounts for more than this, so time the monitor was not
+# running is not counted
+MAX_SAMPLE_GAP = 120.0
+
+
+def get_history_dir() -> Path:
+    return get_data_dir() / "history"
+
+
+def _day(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+class NameTable:
+    """Maps project and agent names to the 16-bit ids stored in records."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.names: List[str] = [""]
+        try:
+            with open(path) as f:
+                self.names = json.load(f) or [""]
+        except (OSError, ValueError):
+            pass
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+    def id_for(self, name: str) -> int:
+        name_id = self._ids.get(name)
+        if name_id is not None:
+            return name_id
+        if len(self.names) > 0xFFFF:
+            return 0
+        name_id = self._ids[name] = len(self.names)
+        self.names.append(name)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.names, f)
+        os.replace(tmp, self.path)
+        return name_id
+
+    def name(self, name_id: int) -> str:
+        return self.names[name_id] if name_id < len(self.names) else f"#{name_id}"
+
+
+class Segment:
+    """One day of records in an append-only, memory-mapped file.
+
+    Records are written before the header count is bumped, so a reader (or
+    a crash) never sees a partial record.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._file = os.fdopen(fd, "r+b")
+        if os.fstat(fd).st_size < HEADER.size:
+            os.ftruncate(fd, HEADER.size + _INITIAL_RECORDS * RECORD.size)
+            self._map = mmap.mmap(fd, 0)
+            HEADER.pack_into(self._map, 0, MAGIC, 0)
+        else:
+            self._map = mmap.mmap(fd, 0)
+            if self._map[:len(MAGIC)] != MAGIC:
+                self.close()
+                raise ValueError(f"{path} is not a history segment")
+        self.count = HEADER.unpack_from(self._map, 0)[1]
+
+    def _capacity(self) -> int:
+        return (len(self._map) - HEADER.size) // RECORD.size
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._capacity()
+        while capacity < needed:
+            capacity *= 2
+        self._map.close()
+        os.ftruncate(self._file.fileno(), HEADER.size + capacity * RECORD.size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def append(self, records: List[Tuple[float, int, int, int, float]]) -> None:
+        if self.count + len(records) > self._capacity():
+            self._grow(self.count + len(records))
+        offset = HEADER.size + self.count * RECORD.size
+        for record in records:
+            RECORD.pack_into(self._map, offset, *record)
+            offset += RECORD.size
+        self.count += len(records)
+        HEADER.pack_into(self._map, 0, MAGIC, self.count)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+class HistoryWriter:
+    """Collector listener that appends every snapshot to the history."""
+
+    def __init__(self, directory: Optional[Path] = None, retention_days: int = 90):
+        self.directory = Path(directory) if directory else get_history_dir()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.retention_days = retention_days
+        self.names = NameTable(self.directory / "names.json")
+        self._segment: Optional[Segment] = None
+        self._day: Optional[str] = None
+        self._last_collected: Optional[float] = None
+
+    def __call__(self, snapshot) -> None:
+        collected_at = snapshot.collected_at
+        interval = 0.0
+        if self._last_collected is not None:
+            interval = min(max(0.0, collected_at - self._last_collected), MAX_SAMPLE_GAP)
+        self._last_collected = collected_at
+        if not snapshot.sessions:
+            return
+
+        records = []
+        for session in snapshot.sessions:
+            status = STATUSES.index(session.status) if session.status in STATUSES else 2
+            records.append((
+                collected_at,
+                self.names.id_for(session.project),
+                self.names.id_for(session.agent or ""),
+                status,
+                interval,
+            ))
+        self._segment_for(collected_at).append(records)
+
+    def _segment_for(self, timestamp: float) -> Segment:
+        day = _day(timestamp)
+        if self._segment is None or day != self._day:
+            if self._segment is not None:
+                self._segment.close()
+            self._segment = Segment(self.directory / f"{day}.seg")
+            self._day = day
+            self._prune(timestamp)
+        return self._segment
+
+    def _prune(self, now: float) -> None:
+        cutoff = _day(now - self.retention_days * 86400)
+        for path in self.directory.glob("*.seg"):
+            if path.stem < cutoff:
+                path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+
+def start_history_writer(collector) -> Optional[HistoryWriter]:
+    """Record the collector's snapshots if enabled in config."""
+    from src.config import CONFIG
+
+    settings = CONFIG["history"]
+    if not settings["enabled"]:
+        return None
+    try:
+        writer = HistoryWriter(retention_days=settings["retention_days"])
+    except OSError as e:
+        print(f"History disabled: {e}")
+        return None
+    collector.add_listener(writer)
+    return writer
+
+
+def _segments(directory: Path, start: float, end: float) -> Iterator[Path]:
+    first, last = _day(start), _day(end)
+    for path in sorted(directory.glob("*.seg")):
+        if first <= path.stem <= last:
+            yield path
+
+
+def _scan_numpy(numpy, data, count: int, start: float, end: float,
+                field: str, totals: Dict[int, List[float]]) -> None:
+    dtype = numpy.dtype({
+        'names': ['ts', 'project', 'agent', 'status', 'interval'],
+        'formats': ['<f8', '<u2', '<u2', 'u1', '<f4'],
+        'offsets': [0, 8, 10, 12, 16],
+        'itemsize': RECORD.size,
+    })
+    records = numpy.frombuffer(data, dtype=dtype, count=count, offset=HEADER.size)
+    # Appends are in collection order, so each day is sorted by time
+    lo, hi = numpy.searchsorted(records['ts'], [start, end])
+    records = records[lo:hi]
+    keys = records[field].astype(numpy.int64) * len(STATUSES) + records['status']
+    sums = numpy.bincount(keys, weights=records['interval'])
+    del records, keys
+    for key in numpy.flatnonzero(sums):
+        name_id, status = divmod(int(key), len(STATUSES))
+        totals.setdefault(name_id, [0.0] * len(STATUSES))[status] += float(sums[key])
+
+
+_TIMESTAMP = struct.Struct("<d")
+
+
+def _bisect_time(data, count: int, when: float) -> int:
+    """Index of the first record collected at or after when."""
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _TIMESTAMP.unpack_from(data, HEADER.size + mid * RECORD.size)[0] < when:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _scan_struct(data, count: int, start: float, end: float,
+                 field: str, totals: Dict[int, List[float]]) -> None:
+    index = 1 if field == 'project' else 2
+    # Appends are in collection order, so only the records in range are unpacked
+    lo, hi = _bisect_time(data, count, start), _bisect_time(data, count, end)
+    view = memoryview(data)[HEADER.size + lo * RECORD.size:HEADER.size + hi * RECORD.size]
+    try:
+        for record in RECORD.iter_unpack(view):
+            row = totals.get(record[index])
+            if row is None:
+                row = totals[record[index]] = [0.0] * len(STATUSES)
+            row[record[3]] += record[4]
+    finally:
+        view.release()
+
+
+def aggregate(start: float, end: float, by: str = "project",
+              directory: Optional[Path] = None) -> Dict[str, List[float]]:
+    """Seconds spent in each status per project (or agent) in [start, end)."""
+    directory = Path(directory) if directory else get_history_dir()
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    totals: Dict[int, List[float]] = {}
+    for path in _segments(directory, start, end):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                continue
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, count = HEADER.unpack_from(data, 0)
+                if magic != MAGIC:
+                    continue
+                count = min(count, (len(data) - HEADER.size) // RECORD.size)
+                if numpy is not None:
+                    _scan_numpy(numpy, data, count, start, end, by, totals)
+                else:
+                    _scan_struct(data, count, start, end, by, totals)
+
+    names = NameTable(directory / "names.json")
+    result: Dict[str, List[float]] = {}
+    for name_id, seconds in totals.items():
+        name = names.name(name_id) or "(none)"
+        row = result.setdefault(name, [0.0] * len(STATUSES))
+        for i, value in enumerate(seconds):
+            row[i] += value
+    return result
+
+
+def _parse_when(value: str, now: float) -> float:
+    """'7d', '12h', '30m' ago, or an ISO date/time (local time)."""
+    units = {'d': 86400, 'h': 3600, 'm': 60}
+    if value and value[-1] in units and value[:-1].replace(".", "", 1).isdigit():
+        return now - float(value[:-1]) * units[value[-1]]
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarise recorded session activity")
+    parser.add_argument("--since", default="7d", help="start: 7d, 12h, 30m or an ISO date (default 7d)")
+    parser.add_argument("--until", default=None, help="end, same formats (default now)")
+    parser.add_argument("--by", choices=("project", "agent"), default="project")
+    parser.add_argument("--dir", type=Path, default=None,
+                        help=f"history directory (default: {get_history_dir()})")
+    args = parser.parse_args()
+
+    now = time.time()
+    try:
+        start = _parse_when(args.since, now)
+        end = _parse_when(args.until, now) if args.until else now
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    result = aggregate(start, end, args.by, args.dir)
+    elapsed = time.perf_counter() - started
+
+    width = max([len(args.by)] + [len(name) for name in result])
+    print(f"{args.by:<{width}}  {'active h':>9}  {'idle h':>9}  {'stale h':>9}")
+    for name, seconds in sorted(result.items(), key=lambda item: -item[1][0]):
+        print(f"{name:<{width}}  " + "  ".join(f"{s / 3600:>9.2f}" for s in seconds))
+    print(f"({len(result)} rows in {elapsed * 1000:.0f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Opt-in Prometheus text-format metrics endpoint.
+
+Scrapes are answered from the collector's latest snapshot and the
+in-process counters; they never trigger a scan. Enable with
+
+    [metrics]
+    enabled = true
+    listen = "127.0.0.1:9464"      # or "unix:/run/user/1000/oam-metrics.sock"
+"""
+
+import os
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src import opencode_data, protocol
+from src.collector import Snapshot
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return "{" + inner + "}"
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def metric(self, name: str, kind: str, help_text: str,
+               samples: Iterable[Tuple[Dict[str, str], float]]) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {value}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(snapshot: Snapshot, now: Optional[float] = None) -> str:
+    """Render the exposition text for a snapshot plus process-wide counters."""
+    now = time.time() if now is None else now
+    out = _Writer()
+
+    counts = {"active": 0, "idle": 0, "stale": 0}
+    for session in snapshot.sessions:
+        counts[session.status] = counts.get(session.status, 0) + 1
+    out.metric("opencode_sessions", "gauge", "Running opencode sessions by status.",
+               (({"status": status}, count) for status, count in counts.items()))
+
+    out.metric("opencode_session_last_active_age_seconds", "gauge",
+               "Seconds since each session last used CPU.",
+               (({"session": s.id, "project": s.project, "status": s.status},
+                 round(now - s.last_active_raw / 1000, 3))
+                for s in snapshot.sessions if s.last_active_raw))
+
+    out.metric("opencode_refreshes_total", "counter", "Completed collection cycles.",
+               [({}, snapshot.seq)])
+    out.metric("opencode_refresh_duration_seconds", "gauge",
+               "Duration of the most recent collection cycle.",
+               [({}, round(snapshot.duration, 6))])
+    if snapshot.collected_at:
+        out.metric("opencode_snapshot_age_seconds", "gauge",
+                   "Seconds since the most recent collection finished.",
+                   [({}, round(now - snapshot.collected_at, 3))])
+
+    cli = opencode_data.get_cli_stats()
+    out.metric("opencode_cli_spawns_total", "counter", "opencode CLI processes started.",
+               [({}, cli['spawns'])])
+    out.metric("opencode_cli_failures_total", "counter", "opencode CLI calls that failed.",
+               [({}, cli['failures'])])
+    out.metric("opencode_cli_rejected_total", "counter",
+               "opencode CLI calls skipped by the circuit breaker or concurrency cap.",
+               [({}, cli['rejected'])])
+    out.metric("opencode_cli_breaker_open", "gauge",
+               "1 while the CLI circuit breaker is open.",
+               [({}, 1 if cli['breaker'] == "open" else 0)])
+
+    cache = opencode_data.get_title_cache_stats()
+    out.metric("opencode_title_cache_requests_total", "counter",
+               "Session title cache lookups by result.",
+               (({"result": result}, cache[key]) for result, key in
+                (("hit", "hits"), ("stale", "stale_hits"), ("miss", "misses"))))
+    out.metric("opencode_title_cache_evictions_total", "counter",
+               "Entries evicted from the session title cache.",
+               [({}, cache['evictions'])])
+    out.metric("opencode_title_cache_entries", "gauge",
+               "Entries in the session title cache.", [({}, cache['size'])])
+
+    return out.text()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    collector = None  # set on the per-server subclass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_metrics(self.collector.snapshot).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket peers have no host address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+class MetricsServer:
+    """Serve /metrics for a collector on localhost TCP or a Unix socket."""
+
+    def __init__(self, collector, listen: str):
+        self.collector = collector
+        self.listen = listen
+        self._server: Optional[socketserver.BaseServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        handler = type("MetricsHandler", (_Handler,), {"collector": self.collector})
+        if self.listen.startswith("unix:"):
+            path = self.listen[len("unix:"):]
+            if os.path.lexists(path):
+                # Only clear a socket left behind by a previous run
+                if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                    raise OSError(f"{path} exists and is not a socket")
+                if protocol.socket_is_live(path):
+                    raise OSError(f"{path} is already being served")
+                os.unlink(path)
+            self._server = _ThreadingUnixHTTPServer(path, handler)
+        else:
+            host, _, port = self.listen.rpartition(":")
+            self._server = _ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if self.listen.startswith("unix:"):
+            try:
+                os.unlink(self.listen[len("unix:"):])
+            except OSError:
+                pass
+
+
+def start_metrics_server(collector) -> Optional[MetricsServer]:
+    """Start the endpoint if enabled in config; None otherwise or on error."""
+    from src.config import CONFIG
+
+    settings = CONFIG["metrics"]
+    if not settings["enabled"]:
+        return None
+    server = MetricsServer(collector, settings["listen"])
+    try:
+        server.start()
+    except (OSError, ValueError) as e:
+        print(f"Metrics endpoint disabled: {e}")
+        return None
+    return server
@@ -0,0 +1,147 @@
+"""Guarded invocations of the opencode CLI.
+
+A missing, slow or broken `opencode` binary would otherwise cost the full
+subprocess timeout on every call. A circuit breaker stops calling it after
+repeated failures, backing off exponentially, and a semaphore caps how many
+CLI processes may run at once.
+"""
+
+import json
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.tracing import TRACER
+
+CLI_TIMEOUT = 2
+MAX_CONCURRENT_CALLS = 2
+
+
+class CircuitBreaker:
+    """Classic closed/open/half-open breaker with exponential backoff."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 3,
+                 base_backoff: float = 5.0, max_backoff: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._trips = 0
+        self._opened_until = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked(time.monotonic())
+
+    def _state_locked(self, now: float) -> str:
+        if self._failures < self.failure_threshold:
+            return self.CLOSED
+        if now < self._opened_until:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may proceed. Half-open admits a single trial call."""
+        with self._lock:
+            state = self._state_locked(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trips = 0
+            self._trial_in_flight = False
+
+    def cancel_trial(self) -> None:
+        """Abandon an admitted call without recording an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold:
+                backoff = min(self.base_backoff * (2 ** self._trips), self.max_backoff)
+                self._trips += 1
+                self._opened_until = time.monotonic() + backoff
+
+
+_breaker = CircuitBreaker()
+_call_slots = threading.BoundedSemaphore(MAX_CONCURRENT_CALLS)
+_stats_lock = threading.Lock()
+_stats = {
+    'spawns': 0,
+    'failures': 0,
+    'rejected': 0,
+}
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def breaker_open() -> bool:
+    """Whether CLI calls are currently being short-circuited."""
+    return _breaker.state == CircuitBreaker.OPEN
+
+
+def get_cli_stats() -> Dict[str, object]:
+    """Spawn/failure/rejection counters and the current breaker state."""
+    with _stats_lock:
+        stats: Dict[str, object] = dict(_stats)
+    stats['breaker'] = _breaker.state
+    return stats
+
+
+def session_list(cwd: str, max_count: int = 20) -> Optional[List[dict]]:
+    """Run `opencode session list` in cwd.
+
+    Returns None on failure, or without spawning anything while the breaker
+    is open or all call slots stay busy for longer than the CLI timeout.
+    """
+    if not _breaker.allow():
+        _count('rejected')
+        return None
+
+    if not _call_slots.acquire(timeout=CLI_TIMEOUT):
+        # Not the CLI's fault; give up a half-open trial without judging it
+        _breaker.cancel_trial()
+        _count('rejected')
+        return None
+
+    try:
+        _count('spawns')
+        with TRACER.span("opencode session list", cwd=cwd):
+            output = subprocess.check_output(
+                ["opencode", "session", "list", "--format", "json",
+                 "--max-count", str(max_count)],
+                stderr=subprocess.DEVNULL,
+                cwd=cwd,
+                timeout=CLI_TIMEOUT,
+            )
+        sessions = json.loads(output)
+    except (subprocess.CalledProcessError, FileNotFoundError,
+            subprocess.TimeoutExpired, json.JSONDecodeError, OSError):
+        _count('failures')
+        _breaker.record_failure()
+        return None
+    finally:
+        _call_slots.release()
+
+    _breaker.record_success()
+    return sessions
@@ -1,19 +1,27 @@
-import subprocess
-import json
 import os
 import time
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Set
+from typing import Collection, List, Dict, Iterable, Optional, Set
 
 from src.platform import (
+    CpuSampler,
+    get_opencode_data_dir,
     get_process_cpu_time,
     get_process_cwd,
+    get_process_tree,
     process_exists,
     find_opencode_processes
 )
+from src import opencode_cli
+from src.activity_history import ActivityHistory
+from src.cache import SWRCache
+from src.path_trie import PathTrie, find_repo_root
+from src.session_store import SessionStore
+from src.timing import TIMINGS
+from src.tracing import TRACER
 
 
-@dataclass
+@dataclass(frozen=True)
 class Session:
     """Represents a running OpenCode session."""
     id: str
@@ -26,6 +34,12 @@ class Session:
     last_active_fmt: str
     agent: Optional[str] = None
     is_group_start: bool = False
+    # Recent CPU rates (ticks/s), oldest first
+    activity: tuple = ()
+    # Name of the child process doing most of the work, while active
+    busy_child: Optional[str] = None
+    # Repository root (or top session directory) the session is grouped under
+    group: str = ""
 
 
 # Status thresholds (in seconds)
@@ -43,8 +57,14 @@ def get_status_from_inactivity(seconds_inactive: float) -> str:
 
 
 _cpu_state: Dict[int, tuple] = {}
-_title_cache: Dict[str, tuple] = {}
+ACTIVITY_SAMPLES = 20
+_activity_history = ActivityHistory(ACTIVITY_SAMPLES)
 _TITLE_CACHE_TTL = 60
+_TITLE_CACHE_MAXSIZE = 256
+# Failed lookups are cached as "no sessions" for this long
+_NEGATIVE_CACHE_TTL = 15
+_session_store = SessionStore(get_opencode_data_dir() / "storage")
+_cpu_sampler = CpuSampler()
 
 
 def get_cpu_time(pid: int) -> Optional[int]:
@@ -52,9 +72,105 @@ def get_cpu_time(pid: int) -> Optional[int]:
 
 
 def is_process_active(pid: int, threshold_ticks: int = 10) -> tuple[bool, float]:
+    return _update_activity(pid, get_cpu_time(pid), time.time(), threshold_ticks)
+
+
+# Last CPU reading of every process in a session's tree, and per session the
+# CPU time its whole tree has accumulated since it was first seen
+_tree_cpu: Dict[int, int] = {}
+_tree_ticks: Dict[int, int] = {}
+
+
+def _descendants(pid: int, children: Dict[int, List[int]],
+                 sessions: Collection[int] = ()) -> List[int]:
+    """Every process below pid, except subtrees rooted at other sessions.
+
+    A session started from inside another (opencode run in an opencode
+    shell) accounts for its own CPU rather than its parent's.
+    """
+    found = []
+    stack = [child for child in children.get(pid, ()) if child not in sessions]
+    while stack:
+        child = stack.pop()
+        found.append(child)
+        stack.extend(grandchild for grandchild in children.get(child, ())
+                     if grandchild not in sessions)
+    return found
+
+
+def _tree_cpu_time(pid: int, tree: List[int],
+                   readings: Dict[int, Optional[int]]) -> tuple:
+    """Fold new readings into the session's tree total.
+
+    Returns (total ticks, busiest descendant or None, its delta, tree delta).
+    A descendant seen for the first time counts in full, since it started
+    after the previous sample; on a session's first sample everything is
+    only recorded.
+    """
+    first = pid not in _tree_ticks
+    total = _tree_ticks.get(pid, 0)
+    busiest, busiest_delta, tree_delta = None, 0, 0
+    for member in (pid, *tree):
+        ticks = readings.get(member)
+        if ticks is None:
+            continue
+        last = _tree_cpu.get(member)
+        _tree_cpu[member] = ticks
+        if first:
+            continue
+        delta = ticks - last if last is not None else ticks
+        if delta <= 0:
+            continue
+        tree_delta += delta
+        if member != pid and delta > busiest_delta:
+            busiest, busiest_delta = member, delta
+    total += tree_delta
+    _tree_ticks[pid] = total
+    return total, busiest, busiest_delta, tree_delta
+
+
+def sample_activity(pids: Iterable[int], threshold_ticks: int = 10,
+                    tree: Optional[tuple] = None) -> Dict[int, tuple]:
+    """is_process_active for many PIDs from one batched CPU read.
+
+    Returns pid -> (is_active, last_active, busy_child); PIDs whose process
+    has exited are left out. With tree, the (children, names) index from
+    get_process_tree, CPU time of every descendant (LSP servers, tool
+    calls, builds) counts towards its session, and busy_child names the
+    descendant doing most of the work while the session is active.
+    """
     now = time.time()
-    cpu_time = get_cpu_time(pid)
-
+    pids = list(pids)
+    children, names = tree if tree else ({}, {})
+    sessions = set(pids)
+    members = {pid: _descendants(pid, children, sessions) for pid in pids}
+    readings = _cpu_sampler.sample(
+        pids + [child for tree_pids in members.values() for child in tree_pids])
+
+    activity: Dict[int, tuple] = {}
+    for pid in pids:
+        cpu_time = readings.get(pid)
+        if cpu_time is None:
+            if not process_exists(pid):
+                continue
+            activity[pid] = (*_update_activity(pid, None, now, threshold_ticks), None)
+            continue
+        total, busiest, busiest_delta, tree_delta = _tree_cpu_time(pid, members[pid], readings)
+        is_active, last_active = _update_activity(pid, total, now, threshold_ticks)
+        busy_child = None
+        if is_active and busiest is not None and busiest_delta * 2 >= tree_delta:
+            busy_child = names.get(busiest)
+        activity[pid] = (is_active, last_active, busy_child)
+
+    live = [pid for pid, ticks in readings.items() if ticks is not None]
+    for member in [member for member in _tree_cpu if readings.get(member) is None]:
+        del _tree_cpu[member]
+    _cpu_sampler.retain(live)
+    return activity
+
+
+def _update_activity(pid: int, cpu_time: Optional[int], now: float,
+                     threshold_ticks: int) -> tuple[bool, float]:
     if cpu_time is None:
         if pid in _cpu_state:
             _, _, last_active = _cpu_state[pid]
@@ -88,83 +204,224 @@ def is_process_active(pid: int, threshold_ticks: int = 10) -> tuple[bool, float]
         return (is_active, last_active)
 
 
+_IGNORED_SUBCOMMANDS = frozenset((
+    'run', 'x', 'acp', 'serve', 'session', 'completion', 'add', 'install',
+    'upgrade', 'debug', 'export', 'import', 'models', 'stats', 'auth', 'mcp',
+    'github', 'pr', 'attach', 'web', 'agent',
+))
+
+# pid -> (create_time, parsed process dict or None if not a session process)
+_process_registry: Dict[int, tuple] = {}
+
+
+def _parse_process(proc: dict) -> Optional[dict]:
+    """Parse the static facts of an opencode process.
+
+    Returns None for processes that are not interactive sessions.
+    """
+    pid = proc['pid']
+    cmdline = proc['cmdline']
+
+    args = cmdline.split()
+
+    if len(args) > 1 and args[1] in _IGNORED_SUBCOMMANDS:
+        return None
+
+    if '/opencode run' in cmdline or 'extension-host' in cmdline:
+        return None
+
+    session_id = None
+    agent_name = None
+    for i, arg in enumerate(args):
+        if arg in ("-s", "--session") and i + 1 < len(args):
+            session_id = args[i + 1]
+        elif arg == "--agent" and i + 1 < len(args):
+            agent_name = args[i + 1]
+
+    return {
+        'pid': pid,
+        'cwd': proc.get('cwd'),
+        'session_id': session_id,
+        'agent': agent_name,
+    }
+
+
+def forget_process(pid: int) -> None:
+    """Drop all per-process state for an exited PID."""
+    _process_registry.pop(pid, None)
+    _cpu_state.pop(pid, None)
+    _cpu_sampler.release(pid)
+    _activity_history.release(pid)
+    _tree_ticks.pop(pid, None)
+    _tree_cpu.pop(pid, None)
+
+
 def get_running_processes() -> List[dict]:
-    processes = []
+    """Get session processes, parsing each (pid, create_time) only once."""
+    with TIMINGS.phase("scan"):
+        proc_list = find_opencode_processes()
 
-    proc_list = find_opencode_processes()
+    with TIMINGS.phase("parse"):
+        return _update_registry(proc_list)
 
-    if not proc_list:
-        return []
+
+def _update_registry(proc_list: List[dict]) -> List[dict]:
+    processes = []
+    current_pids: Set[int] = set()
 
     for proc in proc_list:
         pid = proc['pid']
-        cmdline = proc['cmdline']
+        create_time = proc.get('create_time')
+        current_pids.add(pid)
 
-        args = cmdline.split()
+        entry = _process_registry.get(pid)
+        if entry is not None and entry[0] == create_time:
+            info = entry[1]
+        else:
+            if entry is not None:
+                # PID was reused by a new process
+                forget_process(pid)
+            info = _parse_process(proc)
+            if info is not None and not info['cwd']:
+                with TRACER.span("cwd", pid=pid):
+                    info['cwd'] = get_process_cwd(pid)
+                if not info['cwd']:
+                    # cwd may be transiently unreadable; retry next tick
+                    _process_registry.pop(pid, None)
+                    continue
+            _process_registry[pid] = (create_time, info)
+
+        if info is not None:
+            processes.append(info)
+
+    for pid in [pid for pid in _process_registry if pid not in current_pids]:
+        forget_process(pid)
 
-        if len(args) > 1:
-            subcommand = args[1]
-            if subcommand in ('run', 'x', 'acp', 'serve', 'session',
-                              'completion', 'add', 'install', 'upgrade',
-                              'debug', 'export', 'import', 'models',
-                              'stats', 'auth', 'mcp', 'github', 'pr',
-                              'attach', 'web', 'agent'):
-                continue
+    return processes
 
-        if '/opencode run' in cmdline or 'extension-host' in cmdline:
-            continue
 
-        cwd = get_process_cwd(pid)
-        if not cwd:
+# opencode scopes `session list` to the project of its cwd, so one query per
+# project covers every directory inside it.
+_SESSION_LIST_MAX_COUNT = 100
+_PROJECT_ROOT_CACHE_MAXSIZE = 1024
+_project_root_cache: Dict[str, str] = {}
+
+
+def find_project_root(path: str) -> str:
+    """Find the git repository root containing path ('' if none)."""
+    root = _project_root_cache.get(path)
+    if root is not None:
+        return root
+
+    root = find_repo_root(path) or ""
+    if len(_project_root_cache) >= _PROJECT_ROOT_CACHE_MAXSIZE:
+        _project_root_cache.clear()
+    _project_root_cache[path] = root
+    return root
+
+
+def _load_session_lists(paths: Iterable[str]) -> None:
+    """Query the CLI once per project and cache the results by directory."""
+    groups: Dict[str, List[str]] = {}
+    for path in set(paths):
+        groups.setdefault(find_project_root(path), []).append(path)
+
+    def query(item: tuple) -> tuple:
+        root, directories = item
+        return directories, opencode_cli.session_list(root or directories[0],
+                                                      _SESSION_LIST_MAX_COUNT)
+
+    if len(groups) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=opencode_cli.MAX_CONCURRENT_CALLS) as pool:
+            results = list(pool.map(query, groups.items()))
+    else:
+        results = [query(item) for item in groups.items()]
+
+    for directories, sessions in results:
+        if sessions is None:
+            # Negative-cache directories we know nothing about so they fall
+            # back to directory-name titles; stale entries keep their value.
+            for directory in directories:
+                if _title_cache.peek(directory) is None:
+                    _title_cache.put(directory, [], ttl=_NEGATIVE_CACHE_TTL)
             continue
 
-        session_id = None
-        agent_name = None
-        for i, arg in enumerate(args):
-            if arg in ("-s", "--session") and i + 1 < len(args):
-                session_id = args[i + 1]
-            elif arg == "--agent" and i + 1 < len(args):
-                agent_name = args[i + 1]
-
-        processes.append({
-            'pid': pid,
-            'cwd': cwd,
-            'session_id': session_id,
-            'agent': agent_name,
-        })
+        by_directory: Dict[str, List[dict]] = {}
+        for sess in sessions:
+            by_directory.setdefault(sess.get('directory'), []).append(sess)
 
-    return processes
+        for directory in directories:
+            _title_cache.put(directory, by_directory.get(directory, []))
+
+
+_title_cache = SWRCache(_TITLE_CACHE_MAXSIZE, _TITLE_CACHE_TTL, _load_session_lists)
+
+
+def get_title_cache_stats() -> Dict[str, int]:
+    """Hit/miss/eviction counters for the session title cache."""
+    return _title_cache.stats()
+
+
+def get_state_sizes() -> Dict[str, int]:
+    """Entry counts of the module-level caches, for memory diagnostics."""
+    return {
+        'process_registry': len(_process_registry),
+        'cpu_state': len(_cpu_state),
+        'stat_fds': len(_cpu_sampler),
+        'tree_cpu': len(_tree_cpu),
+        'activity_history': len(_activity_history),
+        'title_cache': len(_title_cache),
+        'project_root_cache': len(_project_root_cache),
+        'session_store_files': len(_session_store),
+    }
+
+
+def get_cli_stats() -> Dict[str, object]:
+    """opencode CLI spawn counters and circuit breaker state."""
+    return opencode_cli.get_cli_stats()
+
+
+def prefetch_session_lists(paths: Iterable[str]) -> None:
+    """Make sure the title cache covers all paths.
+
+    Directories never seen before are loaded synchronously with one CLI
+    query per project; expired ones keep being served while they are
+    refreshed in the background.
+    """
+    if _session_store.refresh():
+        return
+
+    missing = []
+    stale = []
+    for path in set(paths):
+        entry = _title_cache.peek(path)
+        if entry is None:
+            missing.append(path)
+        elif entry[1]:
+            stale.append(path)
+
+    if stale:
+        _title_cache.schedule_refresh(stale)
+    if missing:
+        _load_session_lists(missing)
 
 
 def get_all_sessions_for_path(path: str) -> List[dict]:
     """Get all sessions for a given path."""
-    now = time.time()
-    cache_key = f"all_{path}"
-    
-    if cache_key in _title_cache:
-        sessions, fetched_at = _title_cache[cache_key]
-        if now - fetched_at < _TITLE_CACHE_TTL:
-            return sessions
-
-    try:
-        output = subprocess.check_output(
-            ["opencode", "session", "list", "--format", "json", "--max-count", "20"],
-            stderr=subprocess.DEVNULL,
-            cwd=path,
-            timeout=2,
-        )
-        sessions = json.loads(output)
-        
-        # Filter to sessions matching this directory
-        matching = [s for s in sessions if s.get('directory') == path]
-        _title_cache[cache_key] = (matching, now)
-        return matching
-
-    except (subprocess.CalledProcessError, FileNotFoundError,
-            subprocess.TimeoutExpired, json.JSONDecodeError, OSError):
-        pass
-
-    return []
+    # Prefer reading opencode's storage directly; the CLI is a fallback for
+    # when the on-disk layout isn't recognised.
+    stored = _session_store.sessions_for_directory(path)
+    if stored is not None:
+        return stored
+
+    entry = _title_cache.get(path)
+    if entry is None:
+        _load_session_lists([path])
+        entry = _title_cache.peek(path)
+
+    return entry[0] if entry is not None else []
 
 
 def get_session_title(path: str, session_id: Optional[str] = None) -> tuple[str, str]:
@@ -204,100 +461,130 @@ def format_time_ago(seconds: float) -> str:
 
 
 def fetch_data() -> List[Session]:
+    with TIMINGS.phase("fetch"):
+        sessions = _fetch_data()
+    TIMINGS.maybe_log()
+    return sessions
+
+
+def _fetch_data() -> List[Session]:
     processes = get_running_processes()
 
     if not processes:
         return []
 
+    with TIMINGS.phase("titles"):
+        prefetch_session_lists(proc['cwd'] for proc in processes)
+
     now = time.time()
-    sessions_data: List[dict] = []
 
-    for proc in processes:
-        pid = proc['pid']
-        cwd = proc['cwd']
-        project_name = os.path.basename(cwd)
+    with TIMINGS.phase("tree"):
+        tree = get_process_tree(proc['pid'] for proc in processes)
 
-        # Check if process is actually still running
-        if not process_exists(pid):
-            continue
+    with TIMINGS.phase("cpu"):
+        with TRACER.span("cpu_sample", pids=len(processes)):
+            activity = sample_activity((proc['pid'] for proc in processes), tree=tree)
+        # One pass over the readings is_process_active just stored
+        _activity_history.record(
+            (pid, *_cpu_state[pid][:2]) for pid in activity if pid in _cpu_state)
 
-        is_active, last_active_time = is_process_active(pid)
+    sessions_data: List[dict] = []
 
-        if is_active:
-            seconds_inactive = 0
-            status = "active"
-        elif last_active_time > 0:
-            seconds_inactive = now - last_active_time
-            status = get_status_from_inactivity(seconds_inactive)
-        else:
-            seconds_inactive = float('inf')
-            status = "stale"
+    with TIMINGS.phase("rows"):
+        for proc in processes:
+            pid = proc['pid']
+            if pid not in activity:
+                continue
 
-        if last_active_time > 0:
-            time_fmt = format_time_ago(seconds_inactive)
-        else:
-            time_fmt = ""
-
-        # Use session_id from process args if available
-        proc_session_id = proc.get('session_id')
-        title, session_id = get_session_title(cwd, proc_session_id)
-
-        sessions_data.append({
-            'id': session_id,
-            'pid': pid,
-            'title': title,
-            'project': project_name,
-            'path': cwd,
-            'status': status,
-            'last_active_raw': last_active_time * 1000 if last_active_time else 0,
-            'last_active_fmt': time_fmt,
-            'agent': proc.get('agent'),
-        })
-
-    # Sort all sessions (no deduplication - show each unique session)
-    sessions_data.sort(key=lambda s: (
-        0 if s['status'] == "active" else (1 if s['status'] == "idle" else 2),
-        -(s['last_active_raw'] or 0),
-        s['path'],
-    ))
-
-    # Deduplicate by session ID (not path) - same session ID means same window
-    seen_session_ids: Set[str] = set()
-    active_sessions: List[Session] = []
-    seen_dirs: Set[str] = set()
-
-    for s in sessions_data:
-        # Skip if we've already seen this exact session
-        if s['id'] in seen_session_ids:
-            continue
-        seen_session_ids.add(s['id'])
-        
-        path = s['path']
-        parent = os.path.dirname(path)
-
-        is_new_group = path not in seen_dirs
-        if parent in seen_dirs:
-            is_new_group = False
-
-        seen_dirs.add(path)
-
-        active_sessions.append(Session(
-            id=s['id'],
-            pid=s['pid'],
-            title=s['title'],
-            project=s['project'],
-            path=path,
-            status=s['status'],
-            last_active_raw=s['last_active_raw'],
-            last_active_fmt=s['last_active_fmt'],
-            agent=s['agent'],
-            is_group_start=is_new_group and len(active_sessions) > 0,
+            cwd = proc['cwd']
+            project_name = os.path.basename(cwd)
+            is_active, last_active_time, busy_child = activity[pid]
+
+            if is_active:
+                seconds_inactive = 0
+                status = "active"
+            elif last_active_time > 0:
+                seconds_inactive = now - last_active_time
+                status = get_status_from_inactivity(seconds_inactive)
+            else:
+                seconds_inactive = float('inf')
+                status = "stale"
+
+            if last_active_time > 0:
+                time_fmt = format_time_ago(seconds_inactive)
+            else:
+                time_fmt = ""
+
+            # Use session_id from process args if available
+            proc_session_id = proc.get('session_id')
+            title, session_id = get_session_title(cwd, proc_session_id)
+
+            sessions_data.append({
+                'id': session_id,
+                'pid': pid,
+                'title': title,
+                'project': project_name,
+                'path': cwd,
+                'status': status,
+                'last_active_raw': last_active_time * 1000 if last_active_time else 0,
+                'last_active_fmt': time_fmt,
+                'agent': proc.get('agent'),
+                'activity': _activity_history.rates(pid),
+                'busy_child': busy_child,
+            })
+
+    with TIMINGS.phase("sort"):
+        # Sort all sessions (no deduplication - show each unique session)
+        sessions_data.sort(key=lambda s: (
+            0 if s['status'] == "active" else (1 if s['status'] == "idle" else 2),
+            -(s['last_active_raw'] or 0),
+            s['path'],
+            s['id'],
         ))
 
+        # Deduplicate by session ID (not path) - same session ID means same window
+        seen_session_ids: Set[str] = set()
+        unique: List[dict] = []
+        for s in sessions_data:
+            if s['id'] not in seen_session_ids:
+                seen_session_ids.add(s['id'])
+                unique.append(s)
+
+        # Group by repository; groups are ordered by their best session and
+        # keep the sort order inside
+        trie: PathTrie[dict] = PathTrie()
+        for s in unique:
+            trie.insert(s['path'], s)
+        for group, members in trie.groups().items():
+            for s in members:
+                s['group'] = group
+        grouped: Dict[str, List[dict]] = {}
+        for s in unique:
+            grouped.setdefault(s['group'], []).append(s)
+
+        active_sessions: List[Session] = []
+        for group, members in grouped.items():
+            for i, s in enumerate(members):
+                active_sessions.append(Session(
+                    id=s['id'],
+                    pid=s['pid'],
+                    title=s['title'],
+                    project=s['project'],
+                    path=s['path'],
+                    status=s['status'],
+                    last_active_raw=s['last_active_raw'],
+                    last_active_fmt=s['last_active_fmt'],
+                    agent=s['agent'],
+                    activity=s['activity'],
+                    busy_child=s['busy_child'],
+                    group=group,
+                    is_group_start=i == 0 and len(active_sessions) > 0,
+                ))
+
     return active_sessions
 
 
 def cleanup_stale_pids():
     stale = [pid for pid in _cpu_state if not process_exists(pid)]
     for pid in stale:
-        del _cpu_state[pid]
+        forget_process(pid)
@@ -0,0 +1,81 @@
+"""Group session directories by the git repository that contains them."""
+
+import os
+from typing import Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+_REPO_CACHE_MAXSIZE = 4096
+# directory -> whether it contains .git
+_repo_cache: Dict[str, bool] = {}
+
+
+def is_repo_root(path: str) -> bool:
+    """Whether path holds a .git entry (cached per directory)."""
+    cached = _repo_cache.get(path)
+    if cached is None:
+        cached = os.path.exists(os.path.join(path, ".git"))
+        if len(_repo_cache) >= _REPO_CACHE_MAXSIZE:
+            _repo_cache.clear()
+        _repo_cache[path] = cached
+    return cached
+
+
+class _Node:
+    __slots__ = ("children", "items")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.items: list = []
+
+
+class PathTrie(Generic[T]):
+    """Absolute paths stored by component, so shared prefixes are shared nodes."""
+
+    def __init__(self):
+        self._root = _Node()
+
+    def insert(self, path: str, item: T) -> None:
+        node = self._root
+        for part in path.split(os.sep):
+            if not part:
+                continue
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _Node()
+            node = child
+        node.items.append(item)
+
+    def groups(self) -> Dict[str, List[T]]:
+        """Items keyed by the nearest repository root above them.
+
+        Items outside any repository are keyed by the shallowest directory on
+        their path that holds items itself, so sessions in a plain directory
+        and its subdirectories stay together. Every directory in the trie is
+        visited (and checked for .git) once.
+        """
+        result: Dict[str, List[T]] = {}
+        stack: List[tuple] = [(self._root, os.sep, None, None)]
+        while stack:
+            node, path, repo, fallback = stack.pop()
+            if is_repo_root(path):
+                repo = path
+            if node.items:
+                if fallback is None:
+                    fallback = path
+                result.setdefault(repo or fallback, []).extend(node.items)
+            for name, child in node.children.items():
+                stack.append((child, os.path.join(path, name), repo, fallback))
+        return result
+
+
+def find_repo_root(path: str) -> Optional[str]:
+    """Walk up from path to the nearest repository root, if any."""
+    current = path
+    while True:
+        if is_repo_root(current):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
@@ -1,9 +1,12 @@
 """Cross-platform platform abstraction layer."""
 
+import os
 import sys
+import tempfile
 from pathlib import Path
-from typing import Optional, List, Dict
-import psutil
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.tracing import TRACER
 
 
 def is_macos() -> bool:
@@ -24,8 +27,43 @@ def get_config_dir() -> Path:
         return Path.home() / ".config" / "opencode-activity-monitor"
 
 
+def get_cache_dir() -> Path:
+    """Get platform-appropriate cache directory (dumps, traces)."""
+    if is_macos():
+        return Path.home() / "Library" / "Caches" / "opencode-activity-monitor"
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg_cache_home) if xdg_cache_home else Path.home() / ".cache"
+    return base / "opencode-activity-monitor"
+
+
+def get_data_dir() -> Path:
+    """Get platform-appropriate directory for persistent data (history)."""
+    if is_macos():
+        return get_config_dir()
+    xdg_data_home = os.environ.get("XDG_DATA_HOME")
+    base = Path(xdg_data_home) if xdg_data_home else Path.home() / ".local" / "share"
+    return base / "opencode-activity-monitor"
+
+
+def get_runtime_dir() -> Path:
+    """Get a per-user directory for sockets ($XDG_RUNTIME_DIR where set)."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return Path(runtime_dir)
+    return Path(tempfile.gettempdir())
+
+
+def get_opencode_data_dir() -> Path:
+    """Get opencode's own data directory (it uses XDG paths on all platforms)."""
+    xdg_data_home = os.environ.get("XDG_DATA_HOME")
+    base = Path(xdg_data_home) if xdg_data_home else Path.home() / ".local" / "share"
+    return base / "opencode"
+
+
 def get_process_cwd(pid: int) -> Optional[str]:
     """Get working directory of a process."""
+    import psutil
+
     try:
         return psutil.Process(pid).cwd()
     except (psutil.NoSuchProcess, psutil.AccessDenied):
@@ -34,6 +72,8 @@ def get_process_cwd(pid: int) -> Optional[str]:
 
 def get_process_cpu_time(pid: int) -> Optional[int]:
     """Get total CPU time (user + system) in centiseconds."""
+    import psutil
+
     try:
         times = psutil.Process(pid).cpu_times()
         return int((times.user + times.system) * 100)
@@ -43,13 +83,194 @@ def get_process_cpu_time(pid: int) -> Optional[int]:
 
 def process_exists(pid: int) -> bool:
     """Check if a process exists."""
+    import psutil
+
     return psutil.pid_exists(pid)
 
 
-def find_opencode_processes() -> List[Dict]:
-    """Find all running opencode processes with their PIDs and command lines."""
+def open_pidfd(pid: int) -> Optional[int]:
+    """Open a pidfd that becomes readable when the process exits.
+
+    Returns None where pidfds are unsupported (non-Linux, kernels before
+    5.3) or the process is already gone; callers fall back to polling.
+    """
+    pidfd_open = getattr(os, "pidfd_open", None)
+    if pidfd_open is None:
+        return None
+    try:
+        return pidfd_open(pid)
+    except OSError:
+        return None
+
+
+_PROC_ROOT = "/proc"
+_boot_time: Optional[float] = None
+
+
+def _get_boot_time() -> float:
+    """Get system boot time (epoch seconds) from /proc/stat."""
+    global _boot_time
+    if _boot_time is None:
+        with open(f"{_PROC_ROOT}/stat", "rb") as f:
+            for line in f:
+                if line.startswith(b"btime "):
+                    _boot_time = float(line.split()[1])
+                    break
+            else:
+                _boot_time = 0.0
+    return _boot_time
+
+
+def _read_proc_stat_fields(pid: int) -> Optional[List[bytes]]:
+    """Read /proc/<pid>/stat and return the fields following the comm field.
+
+    Index 0 is the process state (field 3 in proc(5)), so field N is at N - 3.
+    """
+    try:
+        with open(f"{_PROC_ROOT}/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    end = data.rfind(b")")
+    if end < 0:
+        return None
+    return data[end + 2:].split()
+
+
+class CpuSampler:
+    """Batch CPU-time reads that reuse an open /proc/<pid>/stat per process.
+
+    Each read is a preadv into one preallocated buffer, and utime/stime are
+    parsed from it in place, so a tick creates no bytes or str objects. An
+    fd keeps referring to the process it was opened for: once that exits,
+    reads fail with ESRCH even if the PID is reused.
+
+    Where /proc is unavailable, or a `read` function is given, it falls back
+    to one `read(pid)` call per PID.
+    """
+
+    def __init__(self, read: Optional[Callable[[int], Optional[int]]] = None):
+        self._read = read
+        self._procfs = read is None and is_linux() and hasattr(os, "preadv")
+        self._fds: Dict[int, int] = {}
+        self._buf = bytearray(1024)
+        self._bufs = [self._buf]
+        # Report centiseconds, like get_process_cpu_time
+        self._clk_tck = os.sysconf("SC_CLK_TCK") if self._procfs else 100
+
+    def __len__(self) -> int:
+        return len(self._fds)
+
+    def sample(self, pids: Iterable[int]) -> Dict[int, Optional[int]]:
+        """CPU time (centiseconds) for each PID; None if it has exited."""
+        if not self._procfs:
+            read = self._read or get_process_cpu_time
+        else:
+            read = self._sample_procfs
+        if TRACER.enabled:
+            return self._sample_traced(read, pids)
+        return {pid: read(pid) for pid in pids}
+
+    @staticmethod
+    def _sample_traced(read: Callable[[int], Optional[int]],
+                       pids: Iterable[int]) -> Dict[int, Optional[int]]:
+        readings = {}
+        for pid in pids:
+            with TRACER.span("cpu_read", pid=pid):
+                readings[pid] = read(pid)
+        return readings
+
+    def _sample_procfs(self, pid: int) -> Optional[int]:
+        fd = self._fds.get(pid)
+        try:
+            if fd is None:
+                fd = self._fds[pid] = os.open(f"{_PROC_ROOT}/{pid}/stat", os.O_RDONLY | os.O_CLOEXEC)
+            size = os.preadv(fd, self._bufs, 0)
+        except OSError:
+            self.release(pid)
+            return None
+
+        buf = self._buf
+        # comm may contain spaces and parentheses; fields start after the last ")"
+        pos = buf.rfind(b")", 0, size) + 2
+        if pos < 2:
+            return None
+        # Skip state through cstime's predecessors: utime is field 14, i.e.
+        # the 12th field after ")"
+        for _ in range(11):
+            pos = buf.find(b" ", pos, size) + 1
+        utime = 0
+        while buf[pos] != 32:
+            utime = utime * 10 + buf[pos] - 48
+            pos += 1
+        pos += 1
+        stime = 0
+        while buf[pos] != 32:
+            stime = stime * 10 + buf[pos] - 48
+            pos += 1
+        ticks = utime + stime
+        return ticks if self._clk_tck == 100 else ticks * 100 // self._clk_tck
+
+    def release(self, pid: int) -> None:
+        fd = self._fds.pop(pid, None)
+        if fd is not None:
+            os.close(fd)
+
+    def retain(self, pids: Iterable[int]) -> None:
+        """Close the fds of every process not in pids."""
+        keep = set(pids)
+        for pid in [pid for pid in self._fds if pid not in keep]:
+            self.release(pid)
+
+    def close(self) -> None:
+        for pid in list(self._fds):
+            self.release(pid)
+
+
+def _find_opencode_processes_procfs() -> List[Dict]:
+    """Scan /proc directly, reading cwd and stat only for matching processes."""
+    results = []
+    clk_tck = os.sysconf("SC_CLK_TCK")
+    boot_time = _get_boot_time()
+
+    for name in os.listdir(_PROC_ROOT):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"{_PROC_ROOT}/{name}/cmdline", "rb") as f:
+                raw = f.read()
+        except OSError:
+            continue
+
+        if b"opencode" not in raw:
+            continue
+
+        pid = int(name)
+        fields = _read_proc_stat_fields(pid)
+        if fields is None:
+            continue
+
+        try:
+            cwd = os.readlink(f"{_PROC_ROOT}/{name}/cwd")
+        except OSError:
+            cwd = None
+
+        args = raw.rstrip(b"\0").split(b"\0")
+        results.append({
+            'pid': pid,
+            'cmdline': ' '.join(os.fsdecode(arg) for arg in args),
+            'cwd': cwd,
+            'create_time': boot_time + int(fields[19]) / clk_tck,
+        })
+    return results
+
+
+def _find_opencode_processes_psutil() -> List[Dict]:
+    """Find opencode processes via psutil (portable fallback)."""
+    import psutil
+
     results = []
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'cwd']):
+    for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'cwd', 'create_time']):
         try:
             info = proc.info
             cmdline = info.get('cmdline') or []
@@ -59,8 +280,133 @@ def find_opencode_processes() -> List[Dict]:
                 results.append({
                     'pid': info['pid'],
                     'cmdline': cmdline_str,
-                    'cwd': info.get('cwd')
+                    'cwd': info.get('cwd'),
+                    'create_time': info.get('create_time'),
                 })
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             continue
     return results
+
+
+_proc_children: Optional[bool] = None
+
+
+def _has_proc_children() -> bool:
+    """Whether the kernel exposes /proc/<pid>/task/<tid>/children."""
+    global _proc_children
+    if _proc_children is None:
+        _proc_children = os.path.exists(f"{_PROC_ROOT}/thread-self/children")
+    return _proc_children
+
+
+def _read_comm(pid: int) -> str:
+    try:
+        with open(f"{_PROC_ROOT}/{pid}/comm", "rb") as f:
+            return os.fsdecode(f.read().rstrip(b"\n"))
+    except OSError:
+        return ""
+
+
+def _get_process_tree_procfs(roots: Iterable[int]) -> Tuple[Dict[int, List[int]], Dict[int, str]]:
+    """Walk the children files down from roots, touching only descendants."""
+    children: Dict[int, List[int]] = {}
+    names: Dict[int, str] = {}
+    stack = list(roots)
+    seen = set(stack)
+    while stack:
+        pid = stack.pop()
+        try:
+            tasks = os.listdir(f"{_PROC_ROOT}/{pid}/task")
+        except OSError:
+            continue
+        found = []
+        for tid in tasks:
+            try:
+                with open(f"{_PROC_ROOT}/{pid}/task/{tid}/children", "rb") as f:
+                    found.extend(int(child) for child in f.read().split())
+            except OSError:
+                continue
+        for child in found:
+            if child in seen:
+                continue
+            seen.add(child)
+            children.setdefault(pid, []).append(child)
+            names[child] = _read_comm(child)
+            stack.append(child)
+    return children, names
+
+
+def _scan_process_tree_procfs() -> Tuple[Dict[int, List[int]], Dict[int, str]]:
+    """Index every process's parent, for kernels without children files."""
+    children: Dict[int, List[int]] = {}
+    names: Dict[int, str] = {}
+    for name in os.listdir(_PROC_ROOT):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"{_PROC_ROOT}/{name}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        start = data.find(b"(")
+        end = data.rfind(b")")
+        if start < 0 or end < 0:
+            continue
+        pid = int(name)
+        ppid = int(data[end + 2:].split(b" ", 2)[1])
+        children.setdefault(ppid, []).append(pid)
+        names[pid] = os.fsdecode(data[start + 1:end])
+    return children, names
+
+
+def _get_process_tree_psutil(roots: Iterable[int]) -> Tuple[Dict[int, List[int]], Dict[int, str]]:
+    import psutil
+
+    children: Dict[int, List[int]] = {}
+    names: Dict[int, str] = {}
+    stack = list(roots)
+    seen = set(stack)
+    while stack:
+        pid = stack.pop()
+        try:
+            found = psutil.Process(pid).children()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+        for proc in found:
+            if proc.pid in seen:
+                continue
+            seen.add(proc.pid)
+            children.setdefault(pid, []).append(proc.pid)
+            try:
+                names[proc.pid] = proc.name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                names[proc.pid] = ""
+            stack.append(proc.pid)
+    return children, names
+
+
+def get_process_tree(roots: Iterable[int]) -> Tuple[Dict[int, List[int]], Dict[int, str]]:
+    """Index the processes below roots (the session PIDs).
+
+    Returns (parent pid -> child pids, pid -> process name). Only the
+    descendants are read, not the whole process table.
+    """
+    roots = list(roots)
+    if is_linux():
+        try:
+            if _has_proc_children():
+                return _get_process_tree_procfs(roots)
+            return _scan_process_tree_procfs()
+        except OSError:
+            pass
+    return _get_process_tree_psutil(roots)
+
+
+def find_opencode_processes() -> List[Dict]:
+    """Find all running opencode processes with their PIDs and command lines."""
+    if is_linux():
+        try:
+            return _find_opencode_processes_procfs()
+        except OSError:
+            pass
+    return _find_opencode_processes_psutil()
@@ -0,0 +1,69 @@
+"""Newline-delimited JSON protocol shared by the collector daemon and its clients.
+
+Server to client:
+    {"type": "snapshot", "seq": 1, "collected_at": ..., "duration": ..., "sessions": [...]}
+    {"type": "response", "cmd": "<name>", ...}
+
+Client to server:
+    {"cmd": "refresh"}    ask for a collection (rate limited server-side)
+    {"cmd": "snapshot"}   resend the latest snapshot
+"""
+
+import json
+import socket
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+from src.collector import Snapshot
+from src.opencode_data import Session
+from src.platform import get_runtime_dir
+
+SOCKET_NAME = "opencode-activity-monitor.sock"
+
+
+def get_socket_path() -> Path:
+    return get_runtime_dir() / SOCKET_NAME
+
+
+def socket_is_live(path) -> bool:
+    """Whether something accepts connections on the Unix socket at path."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+def snapshot_to_message(snapshot: Snapshot) -> dict:
+    return {
+        'type': 'snapshot',
+        'seq': snapshot.seq,
+        'collected_at': snapshot.collected_at,
+        'duration': snapshot.duration,
+        'sessions': [asdict(s) for s in snapshot.sessions],
+    }
+
+
+def snapshot_from_message(message: dict) -> Optional[Snapshot]:
+    if message.get('type') != 'snapshot':
+        return None
+    try:
+        return Snapshot(
+            seq=message['seq'],
+            sessions=tuple(
+                Session(**{**s, 'activity': tuple(s.get('activity', ()))})
+                for s in message['sessions']
+            ),
+            collected_at=message['collected_at'],
+            duration=message['duration'],
+        )
+    except (KeyError, TypeError):
+        return None
@@ -0,0 +1,44 @@
+"""Adaptive refresh interval based on how busy the sessions are."""
+
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from src.opencode_data import Session
+
+
+class AdaptiveInterval:
+    """Pick the next refresh delay from the latest sessions.
+
+    Refreshes run at `min_ms` while any session is active and at `base_ms`
+    while the busiest session is idle. When nothing is running, or every
+    session is stale, the delay doubles on each refresh up to `max_ms`.
+    """
+
+    def __init__(self, base_ms: int, min_ms: int, max_ms: int):
+        self.min_ms = min(min_ms, base_ms)
+        self.max_ms = max(max_ms, base_ms)
+        self.base_ms = base_ms
+        self._quiet_streak = 0
+
+    def next_interval(self, sessions: Iterable["Session"]) -> int:
+        statuses = {s.status for s in sessions}
+        if "active" in statuses:
+            self._quiet_streak = 0
+            return self.min_ms
+        if "idle" in statuses:
+            self._quiet_streak = 0
+            return self.base_ms
+
+        interval = min(self.base_ms * (2 ** self._quiet_streak), self.max_ms)
+        if interval < self.max_ms:
+            self._quiet_streak += 1
+        return interval
+
+    def reset(self) -> None:
+        """Start over from the base interval (e.g. when the overlay is shown)."""
+        self._quiet_streak = 0
+
+    @property
+    def current_ms(self) -> int:
+        """Best guess for the next delay before any sessions are known."""
+        return min(self.base_ms * (2 ** self._quiet_streak), self.max_ms)
@@ -0,0 +1,167 @@
+"""Direct reader for opencode's on-disk session storage.
+
+opencode keeps one JSON file per session under
+``<data dir>/storage/session/<project id>/<session id>.json``. Reading these
+avoids spawning the opencode CLI just to look up session titles.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.tracing import TRACER
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return 0
+
+
+def _to_listing(data: dict) -> Optional[dict]:
+    """Convert a stored session to the shape `opencode session list` emits.
+
+    Returns None for anything not shaped like a session file.
+    """
+    if not isinstance(data, dict):
+        return None
+    session_id = data.get('id')
+    directory = data.get('directory')
+    if not isinstance(session_id, str) or not isinstance(directory, str):
+        return None
+    times = data.get('time')
+    if not isinstance(times, dict):
+        times = {}
+    title = data.get('title')
+    return {
+        'id': session_id,
+        'title': title if isinstance(title, str) else 'Session',
+        'updated': _timestamp(times.get('updated')),
+        'created': _timestamp(times.get('created')),
+        'projectId': data.get('projectID'),
+        'directory': directory,
+        'parentID': data.get('parentID'),
+    }
+
+
+class SessionStore:
+    """In-memory index over opencode's session files.
+
+    Files are only re-parsed when their mtime or size changes, and the
+    storage directory is rescanned at most once per `min_rescan_interval`.
+    """
+
+    def __init__(self, storage_dir: Path, min_rescan_interval: float = 2.0):
+        self.session_dir = Path(storage_dir) / "session"
+        self.min_rescan_interval = min_rescan_interval
+        self._lock = threading.Lock()
+        # file path -> ((mtime_ns, size), listing or None)
+        self._files: Dict[str, tuple] = {}
+        self._by_directory: Dict[str, List[dict]] = {}
+        self._by_id: Dict[str, dict] = {}
+        self._recognised = False
+        self._scanned_at = 0.0
+
+    def _scan(self) -> None:
+        if not self.session_dir.is_dir():
+            self._recognised = False
+            self._files = {}
+            self._by_directory = {}
+            self._by_id = {}
+            return
+
+        files: Dict[str, tuple] = {}
+        changed = False
+        parsed_any = False
+
+        for project in os.scandir(self.session_dir):
+            if not project.is_dir():
+                continue
+            for entry in os.scandir(project.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                key = (st.st_mtime_ns, st.st_size)
+
+                cached = self._files.get(entry.path)
+                if cached is not None and cached[0] == key:
+                    files[entry.path] = cached
+                    parsed_any = parsed_any or cached[1] is not None
+                    continue
+
+                try:
+                    with open(entry.path, "rb") as f:
+                        listing = _to_listing(json.load(f))
+                except Exception:
+                    # Unreadable, invalid or oddly shaped: one bad file must
+                    # not stop the scan
+                    listing = None
+                files[entry.path] = (key, listing)
+                parsed_any = parsed_any or listing is not None
+                changed = True
+
+        if len(files) != len(self._files):
+            changed = True
+        self._files = files
+        # Files we cannot make sense of mean the on-disk layout has changed
+        # under us; an empty store may be one an older opencode left behind
+        # after moving elsewhere, so the CLI is asked instead.
+        self._recognised = parsed_any
+
+        if changed:
+            self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        by_directory: Dict[str, List[dict]] = {}
+        by_id: Dict[str, dict] = {}
+        for _, listing in self._files.values():
+            if listing is None:
+                continue
+            by_id[listing['id']] = listing
+            # Child sessions (subagents) are not listed by the CLI either
+            if listing.get('parentID'):
+                continue
+            by_directory.setdefault(listing['directory'], []).append(listing)
+
+        for sessions in by_directory.values():
+            sessions.sort(key=lambda s: s['updated'], reverse=True)
+
+        self._by_directory = by_directory
+        self._by_id = by_id
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rescan storage if due. Returns whether the layout is recognised."""
+        with self._lock:
+            now = time.monotonic()
+            if force or now - self._scanned_at >= self.min_rescan_interval:
+                try:
+                    with TRACER.span("session_store.scan"):
+                        self._scan()
+                except OSError:
+                    self._recognised = False
+                self._scanned_at = now
+            return self._recognised
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def sessions_for_directory(self, directory: str) -> Optional[List[dict]]:
+        """Sessions for a directory, most recently updated first.
+
+        Returns None if the storage layout is not recognised.
+        """
+        if not self.refresh():
+            return None
+        return list(self._by_directory.get(directory, ()))
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """Look up a session by id."""
+        if not self.refresh():
+            return None
+        return self._by_id.get(session_id)
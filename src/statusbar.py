@@ -0,0 +1,99 @@
+"""Streaming status-bar output for waybar and similar bars.
+
+Run with `python3 -m src.statusbar` as a waybar `custom` module with a
+persistent `exec`. A compact JSON line is written to stdout whenever the
+session set changes. Nothing here imports GTK.
+"""
+
+import json
+import signal
+import sys
+import threading
+from typing import Dict, Iterable, Optional
+
+from src.collector import EMPTY_SNAPSHOT, Collector, Snapshot
+from src.daemon import drive, follow, start_shared_collector
+from src import timing
+from src.opencode_data import Session
+
+STATUS_ORDER = ("active", "idle", "stale")
+
+
+def format_status(sessions: Iterable[Session]) -> Dict[str, object]:
+    """Build the waybar JSON payload for a set of sessions."""
+    sessions = list(sessions)
+    counts = {status: 0 for status in STATUS_ORDER}
+    for session in sessions:
+        counts[session.status] = counts.get(session.status, 0) + 1
+
+    if not sessions:
+        css_class = "none"
+    else:
+        css_class = next(status for status in STATUS_ORDER if counts[status])
+
+    text = " ".join(f"{counts[status]}{status[0].upper()}"
+                    for status in STATUS_ORDER if counts[status])
+
+    tooltip_lines = []
+    for session in sessions:
+        line = f"{session.status:<6} {session.project}"
+        if session.title and session.title != session.project:
+            line += f" - {session.title}"
+        if session.last_active_fmt:
+            line += f" ({session.last_active_fmt})"
+        tooltip_lines.append(line)
+
+    return {
+        'text': text or "0",
+        'tooltip': "\n".join(tooltip_lines) or "No active sessions",
+        'class': css_class,
+        **counts,
+    }
+
+
+class _Printer:
+    """Print a payload line only when it differs from the previous one."""
+
+    def __init__(self):
+        self._last: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, snapshot: Snapshot) -> None:
+        line = json.dumps(format_status(snapshot.sessions), separators=(",", ":"))
+        with self._lock:
+            if line == self._last:
+                return
+            self._last = line
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+
+def main() -> None:
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    timing.configure()
+    printer = _Printer()
+    while not stop.is_set():
+        collector, server = start_shared_collector()
+        collector.add_listener(printer)
+        collector.start()
+        try:
+            if isinstance(collector, Collector):
+                # No daemon running, so we own the collection schedule
+                drive(collector, stop)
+            else:
+                # Returns when the serving process goes away; then either
+                # take over collecting or attach to whoever replaced it
+                follow(collector, stop)
+                if not stop.is_set():
+                    printer(EMPTY_SNAPSHOT)
+        finally:
+            if server is not None:
+                server.stop()
+            collector.stop()
+
+
+if __name__ == "__main__":
+    main()
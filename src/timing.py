@@ -0,0 +1,126 @@
+"""Lightweight per-phase timing with rolling percentiles.
+
+    with TIMINGS.phase("scan"):
+        ...
+
+Phases are also recorded as trace spans while the tracer is on. When both
+are off, `phase` returns a shared no-op context manager, so the cost of
+leaving the hooks in place is two attribute checks per phase.
+
+Both start off; entry points call configure() to apply config.toml, so
+importing the data pipeline does not load the config.
+"""
+
+import contextlib
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from src.tracing import TRACER
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class _Phase:
+    __slots__ = ("_timings", "_name", "_started")
+
+    def __init__(self, timings: "Timings", name: str):
+        self._timings = timings
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ended = time.perf_counter()
+        if self._timings.enabled:
+            self._timings.record(self._name, ended - self._started)
+        TRACER.add_complete(self._name, self._started, ended)
+        return False
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Timings:
+    """Rolling window of durations per named phase."""
+
+    def __init__(self, enabled: bool = False, window: int = 200,
+                 log_interval: float = 60.0):
+        self.enabled = enabled
+        self.window = window
+        self.log_interval = log_interval
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._last_log = time.monotonic()
+
+    def phase(self, name: str):
+        if not self.enabled and not TRACER.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        samples = self._samples.get(name)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(name, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{phase: {p50, p95, max (all ms), count}} over the rolling window."""
+        with self._lock:
+            phases = list(self._samples.items())
+        result = {}
+        for name, samples in phases:
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            result[name] = {
+                'p50': _percentile(ordered, 0.5) * 1000,
+                'p95': _percentile(ordered, 0.95) * 1000,
+                'max': ordered[-1] * 1000,
+                'count': len(ordered),
+            }
+        return result
+
+    def format_line(self, phases: Optional[list] = None) -> str:
+        """Compact one-line summary: `scan 1.20/3.40 | titles 0.10/0.20` (p50/p95 ms)."""
+        summary = self.summary()
+        names = phases if phases is not None else list(summary)
+        parts = [f"{name} {summary[name]['p50']:.2f}/{summary[name]['p95']:.2f}"
+                 for name in names if name in summary]
+        return " | ".join(parts)
+
+    def maybe_log(self) -> None:
+        """Print the summary at most once per log interval."""
+        if not self.enabled or self.log_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_log < self.log_interval:
+            return
+        self._last_log = now
+        summary = self.summary()
+        parts = [f"{name} p50={s['p50']:.1f} p95={s['p95']:.1f} max={s['max']:.1f}"
+                 for name, s in summary.items()]
+        print("Timings (ms): " + "; ".join(parts))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+TIMINGS = Timings()
+
+
+def configure() -> None:
+    """Apply the [debug] section of config.toml to TIMINGS and TRACER."""
+    from src.config import CONFIG
+    from src import tracing
+
+    debug = CONFIG["debug"]
+    TIMINGS.enabled = debug["timings"]
+    TIMINGS.log_interval = debug["timing_log_interval_s"]
+    tracing.configure()
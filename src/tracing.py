@@ -0,0 +1,155 @@
+"""Chrome trace-event recording of refresh cycles.
+
+Spans are kept as complete ("X") events in a bounded ring buffer, so tracing
+can be left on indefinitely, and dumped as JSON that Perfetto or
+chrome://tracing can open. Tracing is toggled at runtime through the
+collector socket:
+
+    python3 -m src.ctl trace start
+    python3 -m src.ctl trace dump [path]
+    python3 -m src.ctl trace stop
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_args", "_started")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Optional[dict]):
+        self._tracer = tracer
+        self._name = name
+        self._args = args
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._tracer.add_complete(self._name, self._started, time.perf_counter(), self._args)
+        return False
+
+
+class Tracer:
+    """Bounded recorder of trace spans."""
+
+    def __init__(self, max_events: int = 20000):
+        self.enabled = False
+        self._events: Deque[dict] = deque(maxlen=max_events)
+        self._thread_names: Dict[int, str] = {}
+        # perf_counter is monotonic but has an arbitrary epoch; anchor it so
+        # timestamps line up with wall-clock time in the viewer
+        self._epoch_offset = time.time() - time.perf_counter()
+
+    @property
+    def max_events(self) -> int:
+        return self._events.maxlen or 0
+
+    @max_events.setter
+    def max_events(self, value: int) -> None:
+        if value != self._events.maxlen:
+            self._events = deque(self._events, maxlen=value)
+
+    def span(self, name: str, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args or None)
+
+    def add_complete(self, name: str, started: float, ended: float,
+                     args: Optional[dict] = None) -> None:
+        """Record a span given perf_counter() start and end times."""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        tid = thread.ident or 0
+        if tid not in self._thread_names:
+            self._thread_names[tid] = thread.name
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': (started + self._epoch_offset) * 1e6,
+            'dur': (ended - started) * 1e6,
+            'pid': os.getpid(),
+            'tid': tid,
+        }
+        if args:
+            event['args'] = args
+        self._events.append(event)
+
+    def start(self) -> None:
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        self._events.clear()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def dump(self, path: Path) -> int:
+        """Write buffered events as a Chrome trace JSON file. Returns the count."""
+        events = list(self._events)
+        pid = os.getpid()
+        metadata = [{
+            'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+            'args': {'name': name},
+        } for tid, name in list(self._thread_names.items())]
+        metadata.append({
+            'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+            'args': {'name': 'opencode-activity-monitor'},
+        })
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+
+TRACER = Tracer()
+
+
+def configure() -> None:
+    """Apply the [debug] section of config.toml to TRACER."""
+    from src.config import CONFIG
+
+    debug = CONFIG["debug"]
+    TRACER.max_events = debug["trace_buffer_events"]
+    if debug["trace"]:
+        TRACER.start()
+
+
+def default_trace_path() -> Path:
+    from src.platform import get_cache_dir
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return get_cache_dir() / f"trace-{stamp}.json"
+
+
+def handle_trace_command(request: dict) -> dict:
+    """Control-channel handler for {"cmd": "trace", "action": ...}."""
+    action = request.get('action', 'status')
+    if action == 'start':
+        TRACER.start()
+    elif action == 'stop':
+        TRACER.stop()
+    elif action == 'clear':
+        TRACER.clear()
+    elif action == 'dump':
+        path = Path(request.get('path') or default_trace_path())
+        count = TRACER.dump(path)
+        return {'path': str(path), 'events': count, 'enabled': TRACER.enabled}
+    elif action != 'status':
+        return {'error': f"unknown trace action {action!r}"}
+    return {'enabled': TRACER.enabled, 'events': len(TRACER), 'capacity': TRACER.max_events}
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Synthetic benchmark for a refresh cycle at different session counts.
+
+Drives `fetch_data`, `get_running_processes` and `sample_activity`
+against a fake process table and a stub `opencode` CLI, so it runs offline
+on any Linux box without opencode or real sessions.
+
+    python3 tools/bench_fetch_data.py [--sizes 1,10,100,1000] [--rounds 20] [--store]
+
+For each size it reports per-call latency (median / p95 / max in ms) and
+peak traced allocations (KiB) over the rounds, then the warm fetch_data
+broken down by pipeline phase (scan, parse, titles, ...) from TIMINGS.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from src import opencode_cli, opencode_data, path_trie  # noqa: E402
+from src.timing import TIMINGS  # noqa: E402
+from tools.fake_platform import FakeProcessTable, point_store_at, write_store  # noqa: E402
+
+STUB_CLI = """#!{python}
+import json, os, sys
+with open({fixture!r}) as f:
+    sessions = json.load(f)
+cwd = os.getcwd()
+print(json.dumps([s for s in sessions if s["directory"].startswith(cwd)]))
+"""
+
+
+class BenchProcessTable(FakeProcessTable):
+    """N opencode processes over many directories."""
+
+    def __init__(self, root: Path, count: int):
+        self.processes = []
+        self.cpu = {}
+        repos = max(1, count // 10)
+        for i in range(count):
+            repo = root / f"repo{i % repos}"
+            cwd = repo / "packages" / f"pkg{i % 3}" if i % 2 else repo
+            cwd.mkdir(parents=True, exist_ok=True)
+            (repo / ".git").mkdir(exist_ok=True)
+            pid = 100000 + i
+            self.processes.append({
+                'pid': pid,
+                'cmdline': f"/usr/bin/opencode --session ses_{i:05d} --agent build",
+                'cwd': str(cwd),
+                'create_time': 1.0 + i,
+            })
+            self.cpu[pid] = 0
+
+    def find_opencode_processes(self) -> List[dict]:
+        return list(self.processes)
+
+    def get_process_cpu_time(self, pid: int) -> int:
+        # Every third session burns CPU, the rest sit idle
+        if pid % 3 == 0:
+            self.cpu[pid] += 50
+        return self.cpu[pid]
+
+    def process_exists(self, pid: int) -> bool:
+        return pid in self.cpu
+
+    def session_listings(self) -> List[dict]:
+        return [{
+            'id': f"ses_{i:05d}",
+            'title': f"Session {i}",
+            'updated': 1_700_000_000_000 + i,
+            'created': 1_700_000_000_000,
+            'projectId': "bench",
+            'directory': proc['cwd'],
+        } for i, proc in enumerate(self.processes)]
+
+
+def reset_state() -> None:
+    """Forget everything earlier cycles (or sizes) left in module state."""
+    opencode_data._process_registry.clear()
+    opencode_data._cpu_state.clear()
+    opencode_data._cpu_sampler.close()
+    opencode_data._activity_history.clear()
+    opencode_data._tree_cpu.clear()
+    opencode_data._tree_ticks.clear()
+    opencode_data._title_cache.clear()
+    opencode_data._project_root_cache.clear()
+    path_trie._repo_cache.clear()
+    opencode_cli._breaker = opencode_cli.CircuitBreaker()
+    with opencode_cli._stats_lock:
+        for key in opencode_cli._stats:
+            opencode_cli._stats[key] = 0
+    TIMINGS.reset()
+
+
+def measure(fn: Callable[[], object], rounds: int,
+            setup: Optional[Callable[[], object]] = None) -> Dict[str, float]:
+    """Time fn over rounds; setup runs untimed before each round."""
+    timings = []
+    peak = 0
+    for _ in range(rounds):
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    timings.sort()
+    return {
+        'median': statistics.median(timings),
+        'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'max': timings[-1],
+        'peak_kib': peak / 1024,
+    }
+
+
+def bench_size(workdir: Path, count: int, rounds: int, use_store: bool) -> Dict[str, Dict[str, float]]:
+    root = workdir / f"n{count}"
+    table = BenchProcessTable(root / "projects", count)
+    table.install()
+
+    listings = table.session_listings()
+    fixture = root / "sessions.json"
+    fixture.write_text(json.dumps(listings))
+    storage = root / "storage"
+    if use_store:
+        write_store(storage, listings)
+    point_store_at(storage)
+
+    bin_dir = root / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "opencode"
+    stub.write_text(STUB_CLI.format(python=sys.executable, fixture=str(fixture)))
+    stub.chmod(0o755)
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+
+    results = {}
+    reset_state()
+    pids = [p['pid'] for p in table.processes]
+
+    # Cold cycle: every title has to be loaded (store or CLI)
+    results['fetch_data (cold)'] = measure(opencode_data.fetch_data, 1, setup=reset_state)
+    results['get_running_processes'] = measure(opencode_data.get_running_processes, rounds)
+
+    def activity():
+        opencode_data.sample_activity(pids)
+
+    def age_samples():
+        # Spread the activity samples out enough for a rate to be computed
+        for pid, (cpu, _, last_active) in list(opencode_data._cpu_state.items()):
+            opencode_data._cpu_state[pid] = (cpu, time.time() - 2, last_active)
+
+    opencode_data._cpu_state.clear()
+    activity()
+    results['sample_activity (all)'] = measure(activity, rounds, setup=age_samples)
+    TIMINGS.reset()
+    results['fetch_data (warm)'] = measure(opencode_data.fetch_data, rounds)
+    results['phases'] = TIMINGS.summary()
+    results['cli'] = {k: v for k, v in opencode_data.get_cli_stats().items() if k != 'breaker'}
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark a refresh cycle")
+    parser.add_argument("--sizes", default="1,10,100,1000",
+                        help="comma-separated session counts")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--store", action="store_true",
+                        help="serve titles from a fake on-disk session store instead of the stub CLI")
+    args = parser.parse_args()
+
+    # Timed phases feed the per-phase breakdown; tracing stays off
+    TIMINGS.enabled = True
+    TIMINGS.log_interval = 0
+    original_path = os.environ["PATH"]
+    with tempfile.TemporaryDirectory(prefix="oam-bench-") as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            os.environ["PATH"] = original_path
+            results = bench_size(Path(tmp), size, args.rounds, args.store)
+            cli = results.pop('cli')
+            phases = results.pop('phases')
+            print(f"\n{size} sessions  (CLI spawns: {cli['spawns']})")
+            print(f"  {'call':<26}{'median ms':>11}{'p95 ms':>10}{'max ms':>10}{'peak KiB':>11}")
+            for name, r in results.items():
+                print(f"  {name:<26}{r['median']:>11.2f}{r['p95']:>10.2f}{r['max']:>10.2f}"
+                      f"{r['peak_kib']:>11.1f}")
+            print(f"  {'fetch_data (warm) phase':<26}{'p50 ms':>11}{'p95 ms':>10}{'max ms':>10}")
+            for name, s in phases.items():
+                print(f"    {name:<24}{s['p50']:>11.2f}{s['p95']:>10.2f}{s['max']:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Import-time regression check.
+
+Runs `python -X importtime -c "import <module>"` for each entry point and
+fails if it pulls in modules that should only load later in startup, or if
+its cumulative import time exceeds the budget. Checks whose dependencies
+are not installed are skipped.
+
+    python3 tools/check_importtime.py [--budget-scale 2.0]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# (module, modules it must not import, cumulative budget in ms, requirements)
+CHECKS = [
+    ("src.config", {"psutil", "gi", "cairo", "tomllib", "tomli"}, 50, ()),
+    ("src.opencode_data", {"psutil", "gi", "cairo", "concurrent.futures", "tomllib"}, 100, ()),
+    ("src.statusbar", {"psutil", "gi", "cairo"}, 150, ()),
+    ("omarchy.main", {"cairo", "psutil", "omarchy.overlay", "src.opencode_data"}, 400, ("gi",)),
+]
+
+
+def measure(module: str) -> Tuple[Optional[int], Dict[str, int]]:
+    """Import module in a fresh interpreter.
+
+    Returns (cumulative us for module or None on failure, {imported: cumulative us}).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    imported: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            imported[name.strip()] = int(cumulative)
+        except ValueError:
+            continue  # header line
+    if result.returncode != 0:
+        return None, imported
+    return imported.get(module), imported
+
+
+def available(requirement: str) -> bool:
+    return subprocess.run(
+        [sys.executable, "-c", f"import {requirement}"],
+        capture_output=True,
+    ).returncode == 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time regression check")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply every time budget (for slow machines)")
+    args = parser.parse_args()
+
+    failed = False
+    for module, forbidden, budget_ms, requirements in CHECKS:
+        missing = [r for r in requirements if not available(r)]
+        if missing:
+            print(f"SKIP {module}: {', '.join(missing)} not installed")
+            continue
+
+        cumulative_us, imported = measure(module)
+        if cumulative_us is None:
+            print(f"FAIL {module}: import failed")
+            failed = True
+            continue
+
+        leaked = sorted(forbidden & imported.keys())
+        elapsed_ms = cumulative_us / 1000
+        limit_ms = budget_ms * args.budget_scale
+        problems = []
+        if leaked:
+            problems.append(f"imports {', '.join(leaked)}")
+        if elapsed_ms > limit_ms:
+            problems.append(f"{elapsed_ms:.1f}ms > {limit_ms:.0f}ms budget")
+
+        if problems:
+            print(f"FAIL {module}: {'; '.join(problems)}")
+            failed = True
+        else:
+            print(f"ok   {module}: {elapsed_ms:.1f}ms (budget {limit_ms:.0f}ms)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Fake platform layer shared by the offline benchmark and soak test.
+
+Both drive `src.opencode_data` against synthetic opencode processes and a
+fake on-disk session store. This is the one place that knows which of its
+platform hooks and module globals to replace.
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from src import opencode_data
+from src.platform import CpuSampler
+
+
+class FakeProcessTable:
+    """Base for synthetic process tables.
+
+    Subclasses implement find_opencode_processes, get_process_cpu_time and
+    process_exists; install() points opencode_data at them.
+    """
+
+    def find_opencode_processes(self) -> List[dict]:
+        raise NotImplementedError
+
+    def get_process_cpu_time(self, pid: int) -> Optional[int]:
+        raise NotImplementedError
+
+    def process_exists(self, pid: int) -> bool:
+        raise NotImplementedError
+
+    def get_process_cwd(self, pid: int) -> Optional[str]:
+        return None
+
+    def install(self) -> None:
+        opencode_data.find_opencode_processes = self.find_opencode_processes
+        opencode_data.get_process_cpu_time = self.get_process_cpu_time
+        opencode_data.process_exists = self.process_exists
+        opencode_data.get_process_cwd = self.get_process_cwd
+        opencode_data._cpu_sampler = CpuSampler(read=self.get_process_cpu_time)
+        # No child processes, so no tree CPU
+        opencode_data.get_process_tree = lambda roots: ({}, {})
+
+
+def write_store(storage: Path, listings: Iterable[dict]) -> None:
+    """Write listings (in `opencode session list` shape) as session files."""
+    for s in listings:
+        project_dir = storage / "session" / s['projectId']
+        project_dir.mkdir(parents=True, exist_ok=True)
+        data = {
+            'id': s['id'], 'projectID': s['projectId'], 'directory': s['directory'],
+            'title': s['title'], 'time': {'created': s['created'], 'updated': s['updated']},
+        }
+        (project_dir / f"{s['id']}.json").write_text(json.dumps(data))
+
+
+def point_store_at(storage: Path) -> None:
+    """Read titles from the session store under storage from now on."""
+    opencode_data._session_store.session_dir = storage / "session"
+    opencode_data._session_store.refresh(force=True)
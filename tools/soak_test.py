@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Soak test: memory must stay flat over many refresh cycles.
+
+Drives `fetch_data` against a fake process table where opencode processes
+keep exiting and restarting under new PIDs, with titles served from a fake
+on-disk session store. After a warm-up, traced allocations and RSS are
+sampled; the run fails if either grows by more than the allowed budget.
+
+    python3 tools/soak_test.py [--cycles 5000] [--sessions 50] [--max-growth-kib 256]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from src import opencode_data  # noqa: E402
+from src.diagnostics import get_memory_usage  # noqa: E402
+from tools.fake_platform import FakeProcessTable, point_store_at, write_store  # noqa: E402
+
+
+class ChurningProcessTable(FakeProcessTable):
+    """A fixed pool of sessions whose processes restart under fresh PIDs."""
+
+    def __init__(self, root: Path, sessions: int, churn: float, seed: int = 0):
+        self.random = random.Random(seed)
+        self.churn = churn
+        self.next_pid = 200000
+        self.cwds = []
+        for i in range(sessions):
+            repo = root / f"repo{i % 7}"
+            cwd = repo / f"pkg{i % 5}"
+            cwd.mkdir(parents=True, exist_ok=True)
+            (repo / ".git").mkdir(exist_ok=True)
+            self.cwds.append(str(cwd))
+        self.procs = {}
+        for slot in range(sessions):
+            self._spawn(slot)
+
+    def _spawn(self, slot: int) -> None:
+        pid = self.next_pid
+        self.next_pid += 1
+        self.procs[slot] = {
+            'pid': pid,
+            'cmdline': f"/usr/bin/opencode --session ses_{slot:05d}",
+            'cwd': self.cwds[slot],
+            'create_time': float(pid),
+            'cpu': 0,
+        }
+
+    def tick(self) -> None:
+        for slot in list(self.procs):
+            if self.random.random() < self.churn:
+                self._spawn(slot)
+            elif slot % 2:
+                self.procs[slot]['cpu'] += 20
+
+    def find_opencode_processes(self) -> List[dict]:
+        return [{k: v for k, v in p.items() if k != 'cpu'} for p in self.procs.values()]
+
+    def _by_pid(self, pid: int):
+        for proc in self.procs.values():
+            if proc['pid'] == pid:
+                return proc
+        return None
+
+    def get_process_cpu_time(self, pid: int):
+        proc = self._by_pid(pid)
+        return proc['cpu'] if proc else None
+
+    def process_exists(self, pid: int) -> bool:
+        return self._by_pid(pid) is not None
+
+    def session_listings(self) -> List[dict]:
+        return [{
+            'id': f"ses_{slot:05d}",
+            'title': f"Session {slot}",
+            'updated': 1_700_000_000_000 + slot,
+            'created': 1_700_000_000_000,
+            'projectId': "soak",
+            'directory': cwd,
+        } for slot, cwd in enumerate(self.cwds)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check that memory stays flat over many refreshes")
+    parser.add_argument("--cycles", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--churn", type=float, default=0.05,
+                        help="chance per cycle that a session's process restarts")
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--max-growth-kib", type=float, default=256.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="oam-soak-") as tmp:
+        root = Path(tmp)
+        table = ChurningProcessTable(root / "projects", args.sessions, args.churn)
+        table.install()
+        write_store(root / "storage", table.session_listings())
+        point_store_at(root / "storage")
+
+        tracemalloc.start()
+        baseline = None
+        for cycle in range(1, args.cycles + 1):
+            table.tick()
+            opencode_data.fetch_data()
+            if cycle == args.warmup:
+                baseline = (tracemalloc.get_traced_memory()[0], get_memory_usage()['rss_kib'])
+            if cycle % 1000 == 0:
+                print(f"cycle {cycle:>6}: traced {tracemalloc.get_traced_memory()[0] / 1024:8.1f} KiB, "
+                      f"rss {get_memory_usage()['rss_kib']} KiB, caches {opencode_data.get_state_sizes()}")
+
+        traced, rss = tracemalloc.get_traced_memory()[0], get_memory_usage()['rss_kib']
+        tracemalloc.stop()
+
+    if baseline is None:
+        print("cycles must exceed warmup", file=sys.stderr)
+        return 2
+
+    traced_growth = (traced - baseline[0]) / 1024
+    rss_growth = (rss - baseline[1]) if rss is not None and baseline[1] is not None else 0
+    print(f"growth after warm-up: traced {traced_growth:+.1f} KiB, rss {rss_growth:+d} KiB")
+
+    sizes = opencode_data.get_state_sizes()
+    failures = []
+    if traced_growth > args.max_growth_kib:
+        failures.append(f"traced memory grew {traced_growth:.1f} KiB")
+    if rss_growth > args.max_growth_kib * 4:
+        failures.append(f"RSS grew {rss_growth} KiB")
+    for name in ('process_registry', 'cpu_state'):
+        if sizes[name] > args.sessions:
+            failures.append(f"{name} holds {sizes[name]} entries for {args.sessions} processes")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())